@@ -10,13 +10,21 @@
 
 import argparse
 import difflib
+import fnmatch
 import hashlib
+import html
+import io
+import json
 import logging
 import os
+import re
+import stat
 import sys
+import threading
 import time
-from enum import Enum
-from typing import Dict, List, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from enum import IntEnum
+from typing import Callable, Dict, List, Optional, Pattern, Set, Tuple
 
 # 配置日志
 logging.basicConfig(
@@ -26,14 +34,38 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
 
-class CompareResult(Enum):
-    """比较结果枚举"""
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# 写入报告文件时使用的缓冲区大小
+REPORT_BUFFER_SIZE = 1024 * 1024
+
+# 计算哈希时每次读取的块大小
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 文件不小于该大小时，两个文件的哈希在两个线程中同时计算
+PARALLEL_HASH_MIN_SIZE = 4 * 1024 * 1024
+
+# HTML报告中差异行类型（行首字符）对应的起始标签
+DIFF_LINE_OPEN_TAGS = {
+    ord('+'): "<div class='diff-add'>",
+    ord('-'): "<div class='diff-del'>",
+    ord('@'): "<div class='diff-info'>",
+}
+
+
+class CompareResult(IntEnum):
+    """比较结果枚举，取值同时作为结果列表的下标"""
     IDENTICAL = 0  # 完全相同
     CONTENT_DIFF = 1  # 内容不同
     LEFT_ONLY = 2  # 仅存在于左侧
     RIGHT_ONLY = 3  # 仅存在于右侧
     TYPE_DIFF = 4  # 类型不同（一个是文件，一个是目录）
+    RENAMED = 5  # 内容相同但路径不同（重命名或移动）
 
 
 class FileComparer:
@@ -47,7 +79,8 @@ class FileComparer:
                  ignore_whitespace: bool = False,
                  ignore_case: bool = False,
                  ignore_blank_lines: bool = False,
-                 context_lines: int = 3):
+                 context_lines: int = 3,
+                 max_workers: Optional[int] = None):
         """
         初始化比较器
         
@@ -56,39 +89,47 @@ class FileComparer:
             ignore_case: 是否忽略大小写差异
             ignore_blank_lines: 是否忽略空行
             context_lines: 显示差异上下文的行数
+            max_workers: 目录比较时的最大并行线程数，默认为CPU核心数
         """
         self.ignore_whitespace = ignore_whitespace
         self.ignore_case = ignore_case
         self.ignore_blank_lines = ignore_blank_lines
         self.context_lines = context_lines
+        self.max_workers = max_workers or os.cpu_count() or 1
 
-        # 用于存储比较结果
-        self.result_summary = {
-            CompareResult.IDENTICAL: [],
-            CompareResult.CONTENT_DIFF: [],
-            CompareResult.LEFT_ONLY: [],
-            CompareResult.RIGHT_ONLY: [],
-            CompareResult.TYPE_DIFF: []
-        }
+        # 用于存储比较结果，按CompareResult的取值索引
+        self.result_summary = [[] for _ in CompareResult]
 
-        # 存储详细的差异信息
+        # 存储详细的差异信息，{文件路径: 差异行列表}
         self.diff_details = {}
 
+        # 差异各行的类型（行首字符），{文件路径: bytes}，供生成HTML报告时直接查表
+        self._diff_line_kinds = {}
+
+        # 编译后的忽略模式
+        self._ignore_re = None
+
+        # 并行计算大文件哈希的线程池，首次使用时创建，目录比较结束后关闭
+        self._hash_executor = None
+        self._hash_executor_lock = threading.Lock()
+
     def reset(self):
         """重置比较结果"""
-        self.result_summary = {
-            CompareResult.IDENTICAL: [],
-            CompareResult.CONTENT_DIFF: [],
-            CompareResult.LEFT_ONLY: [],
-            CompareResult.RIGHT_ONLY: [],
-            CompareResult.TYPE_DIFF: []
-        }
+        self.result_summary = [[] for _ in CompareResult]
         self.diff_details = {}
+        self._diff_line_kinds = {}
+
+    @property
+    def summary_dict(self) -> Dict[CompareResult, List[str]]:
+        """以 {CompareResult: 路径列表} 字典形式返回比较结果"""
+        return {result: self.result_summary[result] for result in CompareResult}
 
     def compare_files(self,
                       file1_path: str,
                       file2_path: str,
-                      binary_mode: bool = False) -> CompareResult:
+                      binary_mode: bool = False,
+                      st1: Optional[os.stat_result] = None,
+                      st2: Optional[os.stat_result] = None) -> CompareResult:
         """
         比较两个文件的内容
         
@@ -96,22 +137,28 @@ class FileComparer:
             file1_path: 第一个文件路径
             file2_path: 第二个文件路径
             binary_mode: 是否以二进制模式比较
+            st1: 第一个文件已获取的stat结果，省略时重新获取
+            st2: 第二个文件已获取的stat结果，省略时重新获取
             
         Returns:
             比较结果
         """
-        if not os.path.exists(file1_path):
-            raise FileNotFoundError(f"文件不存在: {file1_path}")
+        if st1 is None:
+            st1 = self._stat_file(file1_path)
 
-        if not os.path.exists(file2_path):
-            raise FileNotFoundError(f"文件不存在: {file2_path}")
+        if st2 is None:
+            st2 = self._stat_file(file2_path)
 
-        if not os.path.isfile(file1_path) or not os.path.isfile(file2_path):
+        if not stat.S_ISREG(st1.st_mode) or not stat.S_ISREG(st2.st_mode):
             raise ValueError("两个路径都必须是文件")
 
+        # 指向同一个文件（硬链接、相同路径等），无需读取内容
+        if os.path.samestat(st1, st2):
+            return CompareResult.IDENTICAL
+
         # 首先比较文件大小
-        size1 = os.path.getsize(file1_path)
-        size2 = os.path.getsize(file2_path)
+        size1 = st1.st_size
+        size2 = st2.st_size
 
         if size1 != size2:
             logger.debug(f"文件大小不同: {size1} vs {size2}")
@@ -119,7 +166,7 @@ class FileComparer:
 
         # 如果是二进制模式或文件太大，使用哈希值比较
         if binary_mode or size1 > 10 * 1024 * 1024:  # 大于10MB的文件
-            return self._compare_files_by_hash(file1_path, file2_path)
+            return self._compare_files_by_hash(file1_path, file2_path, size1)
         else:
             # 尝试文本比较
             try:
@@ -127,27 +174,91 @@ class FileComparer:
             except UnicodeDecodeError:
                 # 如果解码失败，可能是二进制文件
                 logger.debug("文本比较失败，切换到二进制比较")
-                return self._compare_files_by_hash(file1_path, file2_path)
+                return self._compare_files_by_hash(file1_path, file2_path, size1)
+
+    @staticmethod
+    def _stat_file(file_path: str) -> os.stat_result:
+        """
+        获取文件的stat结果
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            stat结果
+        """
+        try:
+            return os.stat(file_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"文件不存在: {file_path}")
 
-    def _compare_files_by_hash(self, file1_path: str, file2_path: str) -> CompareResult:
+    @staticmethod
+    def _stat_entry(path: str) -> Optional[os.stat_result]:
+        """
+        获取目录项的stat结果
+        
+        Args:
+            path: 文件或目录路径
+            
+        Returns:
+            stat结果，无法获取时返回None
+        """
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+
+    def _compare_files_by_hash(self, file1_path: str, file2_path: str, size: int = 0) -> CompareResult:
         """
         通过计算哈希值比较文件
         
+        hashlib在更新大块数据时会释放GIL，因此较大的文件由两个线程
+        同时读取和计算哈希。
+        
         Args:
             file1_path: 第一个文件路径
             file2_path: 第二个文件路径
+            size: 文件大小（两个文件大小相同）
             
         Returns:
             比较结果
         """
-        hash1 = self._calculate_file_hash(file1_path)
-        hash2 = self._calculate_file_hash(file2_path)
+        if size >= PARALLEL_HASH_MIN_SIZE:
+            future = self._get_hash_executor().submit(self._calculate_file_hash, file2_path)
+            hash1 = self._calculate_file_hash(file1_path)
+            hash2 = future.result()
+        else:
+            hash1 = self._calculate_file_hash(file1_path)
+            hash2 = self._calculate_file_hash(file2_path)
 
         if hash1 == hash2:
             return CompareResult.IDENTICAL
         else:
             return CompareResult.CONTENT_DIFF
 
+    def _get_hash_executor(self) -> ThreadPoolExecutor:
+        """
+        获取用于并行计算哈希的线程池，不存在时创建
+        
+        目录比较时多个工作线程可能同时调用，因此创建过程需要加锁。
+        
+        Returns:
+            线程池
+        """
+        with self._hash_executor_lock:
+            if self._hash_executor is None:
+                self._hash_executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._hash_executor
+
+    def _shutdown_hash_executor(self) -> None:
+        """关闭并行计算哈希的线程池"""
+        with self._hash_executor_lock:
+            executor = self._hash_executor
+            self._hash_executor = None
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+
     def _calculate_file_hash(self, file_path: str) -> str:
         """
         计算文件的MD5哈希值
@@ -159,11 +270,21 @@ class FileComparer:
             MD5哈希值
         """
         hasher = hashlib.md5()
-        with open(file_path, 'rb') as f:
-            buf = f.read(65536)  # 64kb chunks
-            while len(buf) > 0:
-                hasher.update(buf)
-                buf = f.read(65536)
+        buf = bytearray(HASH_CHUNK_SIZE)
+        view = memoryview(buf)
+        with open(file_path, 'rb', buffering=0) as f:
+            # 提示内核按顺序预读
+            if hasattr(os, 'posix_fadvise'):
+                try:
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                except OSError:
+                    pass
+
+            # 读入预分配的缓冲区，避免每次循环重新分配bytes对象
+            n = f.readinto(buf)
+            while n:
+                hasher.update(view[:n])
+                n = f.readinto(buf)
         return hasher.hexdigest()
 
     def _compare_text_files(self, file1_path: str, file2_path: str) -> CompareResult:
@@ -202,9 +323,10 @@ class FileComparer:
             n=self.context_lines
         ))
 
-        # 存储差异详情
+        # 存储差异详情，各行类型（行首字符）单独保存以便生成报告时直接查表
         if diff:
             self.diff_details[file1_path] = diff
+            self._diff_line_kinds[file1_path] = "".join([line[0] for line in diff]).encode('ascii')
             return CompareResult.CONTENT_DIFF
         else:
             return CompareResult.IDENTICAL
@@ -213,7 +335,8 @@ class FileComparer:
                             dir1_path: str,
                             dir2_path: str,
                             recursive: bool = True,
-                            ignore_patterns: List[str] = None) -> Dict:
+                            ignore_patterns: List[str] = None,
+                            use_hash_index: bool = False) -> Dict:
         """
         比较两个目录的结构和内容
         
@@ -222,6 +345,7 @@ class FileComparer:
             dir2_path: 第二个目录路径
             recursive: 是否递归比较子目录
             ignore_patterns: 要忽略的文件或目录模式列表
+            use_hash_index: 是否基于内容哈希索引比较，可识别重命名或移动的文件
             
         Returns:
             比较结果摘要
@@ -238,98 +362,318 @@ class FileComparer:
         dir1_path = os.path.abspath(dir1_path)
         dir2_path = os.path.abspath(dir2_path)
 
+        # 将所有忽略模式一次性编译为单个正则表达式
+        self._ignore_re = self._compile_ignore_patterns(ignore_patterns)
+
         # 进行目录比较
-        self._compare_dir_recursive(
-            dir1_path, dir2_path,
-            recursive=recursive,
-            ignore_patterns=ignore_patterns or []
-        )
+        try:
+            if use_hash_index:
+                self._compare_by_hash_index(dir1_path, dir2_path, recursive=recursive)
+            else:
+                self._compare_dir_recursive(dir1_path, dir2_path, recursive=recursive)
+        finally:
+            self._shutdown_hash_executor()
 
-        return self.result_summary
+        return self.summary_dict
 
     def _compare_dir_recursive(self,
                                dir1_path: str,
                                dir2_path: str,
                                relative_path: str = "",
-                               recursive: bool = True,
-                               ignore_patterns: List[str] = None) -> None:
+                               recursive: bool = True) -> None:
         """
         递归比较目录
         
+        使用工作队列代替递归：每个子目录对作为一个任务提交到线程池，
+        工作线程返回本层的比较结果和发现的子目录，结果在主线程中合并。
+        
         Args:
             dir1_path: 第一个目录路径
             dir2_path: 第二个目录路径
             relative_path: 相对于根目录的路径
             recursive: 是否递归比较子目录
-            ignore_patterns: 要忽略的文件或目录模式列表
         """
-        ignore_patterns = ignore_patterns or []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(self._compare_dir_level, dir1_path, dir2_path, relative_path)}
 
-        # 获取两个目录中的文件和子目录
-        entries1 = set(os.listdir(dir1_path))
-        entries2 = set(os.listdir(dir2_path))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    results, subdirs = future.result()
+
+                    for result, rel_path in results:
+                        self.result_summary[result].append(rel_path)
+
+                    if recursive:
+                        for path1, path2, rel_path in subdirs:
+                            pending.add(executor.submit(self._compare_dir_level, path1, path2, rel_path))
+
+    def _compare_dir_level(self,
+                           dir1_path: str,
+                           dir2_path: str,
+                           relative_path: str) -> Tuple[List[Tuple[CompareResult, str]],
+                                                        List[Tuple[str, str, str]]]:
+        """
+        比较单层目录（不递归）
+        
+        Args:
+            dir1_path: 第一个目录路径
+            dir2_path: 第二个目录路径
+            relative_path: 相对于根目录的路径
+            
+        Returns:
+            (本层比较结果列表, 两侧都存在的子目录列表)
+        """
+        results = []
+        subdirs = []
+
+        # 获取两个目录中的文件和子目录，排序后进行有序归并
+        entries1 = sorted(os.listdir(dir1_path))
+        entries2 = sorted(os.listdir(dir2_path))
+        count1 = len(entries1)
+        count2 = len(entries2)
+        ignore_re = self._ignore_re
+        i = j = 0
+
+        # 单次扫描即可区分仅左侧、仅右侧和两侧都存在的项，同时过滤忽略的项
+        while i < count1 or j < count2:
+            if j >= count2 or (i < count1 and entries1[i] < entries2[j]):
+                entry = entries1[i]
+                i += 1
+                side_result = CompareResult.LEFT_ONLY
+            elif i >= count1 or entries2[j] < entries1[i]:
+                entry = entries2[j]
+                j += 1
+                side_result = CompareResult.RIGHT_ONLY
+            else:
+                entry = entries1[i]
+                i += 1
+                j += 1
+                side_result = None
 
-        # 过滤忽略的文件和目录
-        for pattern in ignore_patterns:
-            entries1 = {e for e in entries1 if not self._match_pattern(e, pattern)}
-            entries2 = {e for e in entries2 if not self._match_pattern(e, pattern)}
+            if ignore_re is not None and ignore_re.match(os.path.normcase(entry)):
+                continue
 
-        # 找出仅在第一个目录中的项
-        for entry in entries1 - entries2:
-            path = os.path.join(relative_path, entry) if relative_path else entry
-            full_path = os.path.join(dir1_path, entry)
-            self.result_summary[CompareResult.LEFT_ONLY].append(path)
+            rel_path = os.path.join(relative_path, entry) if relative_path else entry
 
-        # 找出仅在第二个目录中的项
-        for entry in entries2 - entries1:
-            path = os.path.join(relative_path, entry) if relative_path else entry
-            full_path = os.path.join(dir2_path, entry)
-            self.result_summary[CompareResult.RIGHT_ONLY].append(path)
+            # 仅存在于一侧的项
+            if side_result is not None:
+                results.append((side_result, rel_path))
+                continue
 
-        # 比较两个目录中都存在的项
-        for entry in entries1 & entries2:
+            # 比较两个目录中都存在的项
             path1 = os.path.join(dir1_path, entry)
             path2 = os.path.join(dir2_path, entry)
-            rel_path = os.path.join(relative_path, entry) if relative_path else entry
 
-            # 检查类型是否相同（文件vs目录）
-            is_dir1 = os.path.isdir(path1)
-            is_dir2 = os.path.isdir(path2)
+            # 检查类型是否相同（文件vs目录），每个目录项只获取一次stat
+            st1 = self._stat_entry(path1)
+            st2 = self._stat_entry(path2)
+            is_dir1 = st1 is not None and stat.S_ISDIR(st1.st_mode)
+            is_dir2 = st2 is not None and stat.S_ISDIR(st2.st_mode)
 
             if is_dir1 != is_dir2:
-                self.result_summary[CompareResult.TYPE_DIFF].append(rel_path)
+                results.append((CompareResult.TYPE_DIFF, rel_path))
                 continue
 
             if is_dir1 and is_dir2:
-                # 两者都是目录，如果递归则继续比较
-                if recursive:
-                    self._compare_dir_recursive(
-                        path1, path2,
-                        relative_path=rel_path,
-                        recursive=recursive,
-                        ignore_patterns=ignore_patterns
-                    )
+                # 两者都是目录，交给调用方决定是否继续比较
+                subdirs.append((path1, path2, rel_path))
             else:
                 # 两者都是文件，比较内容
                 try:
-                    result = self.compare_files(path1, path2)
-                    self.result_summary[result].append(rel_path)
+                    result = self.compare_files(path1, path2, st1=st1, st2=st2)
+                    results.append((result, rel_path))
                 except Exception as e:
                     logger.error(f"比较文件时出错 {rel_path}: {e}")
 
-    def _match_pattern(self, name: str, pattern: str) -> bool:
+        return results, subdirs
+
+    def _compare_by_hash_index(self,
+                               dir1_path: str,
+                               dir2_path: str,
+                               recursive: bool = True) -> None:
         """
-        检查文件名是否匹配给定模式
+        基于内容哈希索引比较目录
+        
+        分别遍历两个目录树，对相同相对路径的文件直接比较内容；
+        对仅存在于一侧的文件按大小筛选后计算哈希并建立索引，
+        两侧哈希相同的文件记为重命名或移动。重命名按文件粒度报告；
+        仅存在于一侧的目录只报告最上层，其下未被识别为重命名的项不再单独列出。
         
         Args:
-            name: 文件或目录名
-            pattern: 匹配模式
+            dir1_path: 第一个目录路径
+            dir2_path: 第二个目录路径
+            recursive: 是否递归比较子目录
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            scan1 = executor.submit(self._scan_tree, dir1_path, recursive)
+            scan2 = executor.submit(self._scan_tree, dir2_path, recursive)
+            files1, dirs1 = scan1.result()
+            files2, dirs2 = scan2.result()
+
+            # 一侧是文件、另一侧是目录
+            type_diff_paths = (files1.keys() & dirs2) | (dirs1 & files2.keys())
+            for rel_path in type_diff_paths:
+                self.result_summary[CompareResult.TYPE_DIFF].append(rel_path)
+
+            # 两侧都存在的文件直接比较内容
+            def compare_common(rel_path: str) -> Tuple[str, Optional[CompareResult]]:
+                path1, st1 = files1[rel_path]
+                path2, st2 = files2[rel_path]
+                try:
+                    return rel_path, self.compare_files(path1, path2, st1=st1, st2=st2)
+                except Exception as e:
+                    logger.error(f"比较文件时出错 {rel_path}: {e}")
+                    return rel_path, None
+
+            for rel_path, result in executor.map(compare_common, files1.keys() & files2.keys()):
+                if result is not None:
+                    self.result_summary[result].append(rel_path)
+
+            left_only = files1.keys() - files2.keys() - dirs2
+            right_only = files2.keys() - files1.keys() - dirs1
+
+            # 只有两侧都出现的文件大小才可能是重命名，其余文件无需计算哈希
+            left_sizes = {files1[rel_path][1].st_size for rel_path in left_only}
+            right_sizes = {files2[rel_path][1].st_size for rel_path in right_only}
+            common_sizes = left_sizes & right_sizes
+
+            hashes_left = self._build_hash_index(
+                executor,
+                [(rel_path, files1[rel_path][0]) for rel_path in left_only
+                 if files1[rel_path][1].st_size in common_sizes]
+            )
+            hashes_right = self._build_hash_index(
+                executor,
+                [(rel_path, files2[rel_path][0]) for rel_path in right_only
+                 if files2[rel_path][1].st_size in common_sizes]
+            )
+
+        for digest in hashes_left.keys() & hashes_right.keys():
+            for old_path, new_path in zip(sorted(hashes_left[digest]), sorted(hashes_right[digest])):
+                self.result_summary[CompareResult.RENAMED].append(f"{old_path} -> {new_path}")
+                left_only.discard(old_path)
+                right_only.discard(new_path)
+
+        # 仅存在于一侧的目录（包括空目录），与逐层比较一样只报告最上层
+        left_dirs = dirs1 - dirs2 - files2.keys()
+        right_dirs = dirs2 - dirs1 - files1.keys()
+        left_covered = left_dirs | type_diff_paths
+        right_covered = right_dirs | type_diff_paths
+
+        self.result_summary[CompareResult.LEFT_ONLY].extend(
+            self._exclude_covered(left_dirs | left_only, left_covered))
+        self.result_summary[CompareResult.RIGHT_ONLY].extend(
+            self._exclude_covered(right_dirs | right_only, right_covered))
+
+    def _scan_tree(self,
+                   root_path: str,
+                   recursive: bool = True) -> Tuple[Dict[str, Tuple[str, os.stat_result]], Set[str]]:
+        """
+        遍历目录树，收集文件和子目录
+        
+        Args:
+            root_path: 根目录路径
+            recursive: 是否递归遍历子目录
             
         Returns:
-            是否匹配
+            ({相对路径: (完整路径, stat结果)}, 子目录相对路径集合)
         """
-        import fnmatch
-        return fnmatch.fnmatch(name, pattern)
+        files = {}
+        dirs = set()
+        ignore_re = self._ignore_re
+        stack = [(root_path, "")]
+
+        while stack:
+            dir_path, relative_path = stack.pop()
+
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    if ignore_re is not None and ignore_re.match(os.path.normcase(entry.name)):
+                        continue
+
+                    rel_path = os.path.join(relative_path, entry.name) if relative_path else entry.name
+
+                    try:
+                        st = entry.stat()
+                    except OSError as e:
+                        logger.error(f"无法访问 {entry.path}: {e}")
+                        continue
+
+                    if stat.S_ISDIR(st.st_mode):
+                        dirs.add(rel_path)
+                        if recursive:
+                            stack.append((entry.path, rel_path))
+                    else:
+                        files[rel_path] = (entry.path, st)
+
+        return files, dirs
+
+    @staticmethod
+    def _exclude_covered(paths: Set[str], covered_dirs: Set[str]) -> List[str]:
+        """
+        去掉位于已报告目录之下的路径
+        
+        Args:
+            paths: 相对路径集合
+            covered_dirs: 已报告的目录相对路径集合
+            
+        Returns:
+            不在这些目录之下的路径列表
+        """
+        result = []
+        for rel_path in paths:
+            parent = os.path.dirname(rel_path)
+            while parent and parent not in covered_dirs:
+                parent = os.path.dirname(parent)
+            if not parent:
+                result.append(rel_path)
+        return result
+
+    def _build_hash_index(self,
+                          executor: ThreadPoolExecutor,
+                          items: List[Tuple[str, str]]) -> Dict[str, List[str]]:
+        """
+        并行计算文件哈希并建立 哈希 -> 相对路径列表 的索引
+        
+        Args:
+            executor: 用于计算哈希的线程池
+            items: (相对路径, 完整路径) 列表
+            
+        Returns:
+            哈希索引
+        """
+        def hash_one(item: Tuple[str, str]) -> Tuple[str, Optional[str]]:
+            rel_path, path = item
+            try:
+                return rel_path, self._calculate_file_hash(path)
+            except OSError as e:
+                logger.error(f"计算哈希时出错 {rel_path}: {e}")
+                return rel_path, None
+
+        index = {}
+        for rel_path, digest in executor.map(hash_one, items):
+            if digest is not None:
+                index.setdefault(digest, []).append(rel_path)
+        return index
+
+    @staticmethod
+    def _compile_ignore_patterns(ignore_patterns: Optional[List[str]]) -> Optional[Pattern]:
+        """
+        将忽略模式列表编译为单个正则表达式
+        
+        Args:
+            ignore_patterns: 要忽略的文件或目录模式列表
+            
+        Returns:
+            编译后的正则表达式，没有模式时返回None
+        """
+        if not ignore_patterns:
+            return None
+        return re.compile("|".join(
+            fnmatch.translate(os.path.normcase(pattern)) for pattern in ignore_patterns
+        ))
 
     def generate_diff_report(self,
                              output_format: str = 'text',
@@ -345,85 +689,137 @@ class FileComparer:
             如果没有指定输出文件，则返回报告内容
         """
         if output_format == 'text':
-            report = self._generate_text_report()
+            generator = self._generate_text_report
         elif output_format == 'html':
-            report = self._generate_html_report()
+            generator = self._generate_html_report
         elif output_format == 'json':
-            report = self._generate_json_report()
+            generator = None
         else:
             raise ValueError(f"不支持的输出格式: {output_format}")
 
         if output_file:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(report)
+            # 指定输出文件时直接流式写入，避免在内存中拼接完整报告
+            if generator is None:
+                report = self._build_json_report()
+                if HAS_ORJSON:
+                    # orjson直接输出UTF-8字节，无需再解码
+                    with open(output_file, 'wb') as f:
+                        f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+                else:
+                    with open(output_file, 'w', encoding='utf-8', buffering=REPORT_BUFFER_SIZE) as f:
+                        json.dump(report, f, indent=2, ensure_ascii=False)
+            else:
+                with open(output_file, 'w', encoding='utf-8', buffering=REPORT_BUFFER_SIZE) as f:
+                    generator(f.write)
             return None
-        else:
-            return report
 
-    def _generate_text_report(self) -> str:
+        if generator is None:
+            return self._generate_json_report()
+        return generator()
+
+    @staticmethod
+    def _line_writer(write: Callable[[str], None]) -> Callable[[str], None]:
+        """
+        创建按行输出的写入函数，行与行之间以换行符分隔
+        
+        Args:
+            write: 底层写入函数
+            
+        Returns:
+            按行写入函数
+        """
+        first = True
+
+        def write_line(line: str) -> None:
+            nonlocal first
+            if first:
+                first = False
+            else:
+                write("\n")
+            write(line)
+
+        return write_line
+
+    def _generate_text_report(self, write: Optional[Callable[[str], None]] = None) -> Optional[str]:
         """
         生成文本格式的差异报告
         
+        Args:
+            write: 写入函数，指定时报告逐行写入而不返回
+            
         Returns:
-            报告内容
+            未指定写入函数时返回报告内容
         """
-        lines = ["文件比较报告", "=" * 50, ""]
+        buffer = None
+        if write is None:
+            buffer = io.StringIO()
+            write = buffer.write
+        emit = self._line_writer(write)
+
+        emit("文件比较报告")
+        emit("=" * 50)
+        emit("")
 
         # 添加摘要信息
-        lines.append("比较摘要:")
-        lines.append(f"- 相同文件: {len(self.result_summary[CompareResult.IDENTICAL])}")
-        lines.append(f"- 内容不同: {len(self.result_summary[CompareResult.CONTENT_DIFF])}")
-        lines.append(f"- 仅左侧存在: {len(self.result_summary[CompareResult.LEFT_ONLY])}")
-        lines.append(f"- 仅右侧存在: {len(self.result_summary[CompareResult.RIGHT_ONLY])}")
-        lines.append(f"- 类型不同: {len(self.result_summary[CompareResult.TYPE_DIFF])}")
-        lines.append("")
+        emit("比较摘要:")
+        emit(f"- 相同文件: {len(self.result_summary[CompareResult.IDENTICAL])}")
+        emit(f"- 内容不同: {len(self.result_summary[CompareResult.CONTENT_DIFF])}")
+        emit(f"- 仅左侧存在: {len(self.result_summary[CompareResult.LEFT_ONLY])}")
+        emit(f"- 仅右侧存在: {len(self.result_summary[CompareResult.RIGHT_ONLY])}")
+        emit(f"- 类型不同: {len(self.result_summary[CompareResult.TYPE_DIFF])}")
+        if self.result_summary[CompareResult.RENAMED]:
+            emit(f"- 重命名或移动: {len(self.result_summary[CompareResult.RENAMED])}")
+        emit("")
 
         # 添加详细信息
-        if self.result_summary[CompareResult.CONTENT_DIFF]:
-            lines.append("内容不同的文件:")
-            for path in self.result_summary[CompareResult.CONTENT_DIFF]:
-                lines.append(f"- {path}")
-            lines.append("")
-
-        if self.result_summary[CompareResult.LEFT_ONLY]:
-            lines.append("仅在左侧存在的文件:")
-            for path in self.result_summary[CompareResult.LEFT_ONLY]:
-                lines.append(f"- {path}")
-            lines.append("")
-
-        if self.result_summary[CompareResult.RIGHT_ONLY]:
-            lines.append("仅在右侧存在的文件:")
-            for path in self.result_summary[CompareResult.RIGHT_ONLY]:
-                lines.append(f"- {path}")
-            lines.append("")
-
-        if self.result_summary[CompareResult.TYPE_DIFF]:
-            lines.append("类型不同的项目:")
-            for path in self.result_summary[CompareResult.TYPE_DIFF]:
-                lines.append(f"- {path}")
-            lines.append("")
+        sections = [
+            (CompareResult.CONTENT_DIFF, "内容不同的文件:"),
+            (CompareResult.LEFT_ONLY, "仅在左侧存在的文件:"),
+            (CompareResult.RIGHT_ONLY, "仅在右侧存在的文件:"),
+            (CompareResult.TYPE_DIFF, "类型不同的项目:"),
+            (CompareResult.RENAMED, "重命名或移动的文件:"),
+        ]
+        for result, title in sections:
+            paths = self.result_summary[result]
+            if paths:
+                emit(title)
+                for path in paths:
+                    emit(f"- {path}")
+                emit("")
 
         # 添加差异详情
         if self.diff_details:
-            lines.append("文件差异详情:")
-            lines.append("=" * 50)
+            emit("文件差异详情:")
+            emit("=" * 50)
 
             for file_path, diff in self.diff_details.items():
-                lines.append(f"\n文件: {file_path}")
-                lines.append("-" * 50)
-                lines.extend([line.rstrip() for line in diff])
-                lines.append("-" * 50)
+                emit(f"\n文件: {file_path}")
+                emit("-" * 50)
+                for line in diff:
+                    emit(line.rstrip())
+                emit("-" * 50)
 
-        return "\n".join(lines)
+        if buffer is not None:
+            return buffer.getvalue()
+        return None
 
-    def _generate_html_report(self) -> str:
+    def _generate_html_report(self, write: Optional[Callable[[str], None]] = None) -> Optional[str]:
         """
         生成HTML格式的差异报告
         
+        Args:
+            write: 写入函数，指定时报告逐行写入而不返回
+            
         Returns:
-            HTML报告内容
+            未指定写入函数时返回HTML报告内容
         """
-        html = [
+        buffer = None
+        if write is None:
+            buffer = io.StringIO()
+            write = buffer.write
+        emit = self._line_writer(write)
+
+        for line in (
             "<!DOCTYPE html>",
             "<html>",
             "<head>",
@@ -451,110 +847,69 @@ class FileComparer:
             f"        <p>仅左侧存在: {len(self.result_summary[CompareResult.LEFT_ONLY])}</p>",
             f"        <p>仅右侧存在: {len(self.result_summary[CompareResult.RIGHT_ONLY])}</p>",
             f"        <p>类型不同: {len(self.result_summary[CompareResult.TYPE_DIFF])}</p>",
-            "    </div>",
-            "    <div class='files'>"
+        ):
+            emit(line)
+
+        if self.result_summary[CompareResult.RENAMED]:
+            emit(f"        <p>重命名或移动: {len(self.result_summary[CompareResult.RENAMED])}</p>")
+
+        emit("    </div>")
+        emit("    <div class='files'>")
+
+        # 添加各类文件列表
+        sections = [
+            (CompareResult.CONTENT_DIFF, "内容不同的文件"),
+            (CompareResult.LEFT_ONLY, "仅在左侧存在的文件"),
+            (CompareResult.RIGHT_ONLY, "仅在右侧存在的文件"),
+            (CompareResult.TYPE_DIFF, "类型不同的项目"),
+            (CompareResult.RENAMED, "重命名或移动的文件"),
         ]
+        for result, title in sections:
+            paths = self.result_summary[result]
+            if paths:
+                emit("        <div class='file-group'>")
+                emit(f"            <h2>{title}</h2>")
+                emit("            <ul>")
 
-        # 添加内容不同的文件列表
-        if self.result_summary[CompareResult.CONTENT_DIFF]:
-            html.extend([
-                "        <div class='file-group'>",
-                "            <h2>内容不同的文件</h2>",
-                "            <ul>"
-            ])
-
-            for path in self.result_summary[CompareResult.CONTENT_DIFF]:
-                html.append(f"                <li>{path}</li>")
-
-            html.extend([
-                "            </ul>",
-                "        </div>"
-            ])
-
-        # 添加仅在左侧存在的文件列表
-        if self.result_summary[CompareResult.LEFT_ONLY]:
-            html.extend([
-                "        <div class='file-group'>",
-                "            <h2>仅在左侧存在的文件</h2>",
-                "            <ul>"
-            ])
-
-            for path in self.result_summary[CompareResult.LEFT_ONLY]:
-                html.append(f"                <li>{path}</li>")
-
-            html.extend([
-                "            </ul>",
-                "        </div>"
-            ])
-
-        # 添加仅在右侧存在的文件列表
-        if self.result_summary[CompareResult.RIGHT_ONLY]:
-            html.extend([
-                "        <div class='file-group'>",
-                "            <h2>仅在右侧存在的文件</h2>",
-                "            <ul>"
-            ])
-
-            for path in self.result_summary[CompareResult.RIGHT_ONLY]:
-                html.append(f"                <li>{path}</li>")
-
-            html.extend([
-                "            </ul>",
-                "        </div>"
-            ])
-
-        # 添加类型不同的项目列表
-        if self.result_summary[CompareResult.TYPE_DIFF]:
-            html.extend([
-                "        <div class='file-group'>",
-                "            <h2>类型不同的项目</h2>",
-                "            <ul>"
-            ])
-
-            for path in self.result_summary[CompareResult.TYPE_DIFF]:
-                html.append(f"                <li>{path}</li>")
-
-            html.extend([
-                "            </ul>",
-                "        </div>"
-            ])
+                for path in paths:
+                    emit(f"                <li>{path}</li>")
+
+                emit("            </ul>")
+                emit("        </div>")
 
         # 添加差异详情
         if self.diff_details:
-            html.extend([
-                "        <div class='file-group'>",
-                "            <h2>文件差异详情</h2>"
-            ])
+            emit("        <div class='file-group'>")
+            emit("            <h2>文件差异详情</h2>")
+
+            open_tags = DIFF_LINE_OPEN_TAGS
+            escape = html.escape
+
+            line_kinds = self._diff_line_kinds
 
             for file_path, diff in self.diff_details.items():
-                html.extend([
-                    f"            <h3>文件: {file_path}</h3>",
-                    "            <div class='diff'>"
-                ])
+                emit(f"            <h3>文件: {file_path}</h3>")
+                emit("            <div class='diff'>")
 
-                for line in diff:
-                    line_html = line.replace("<", "&lt;").replace(">", "&gt;")
-
-                    if line.startswith("+"):
-                        html.append(f"<div class='diff-add'>{line_html}</div>")
-                    elif line.startswith("-"):
-                        html.append(f"<div class='diff-del'>{line_html}</div>")
-                    elif line.startswith("@@"):
-                        html.append(f"<div class='diff-info'>{line_html}</div>")
-                    else:
-                        html.append(f"<div>{line_html}</div>")
+                # 外部直接写入diff_details的条目没有预先计算的行类型，此时现场计算
+                kinds = line_kinds.get(file_path)
+                if kinds is None:
+                    kinds = [ord(line[:1] or ' ') for line in diff]
+
+                for kind, line in zip(kinds, diff):
+                    emit(f"{open_tags.get(kind, '<div>')}{escape(line, quote=False)}</div>")
 
-                html.append("            </div>")
+                emit("            </div>")
 
-            html.append("        </div>")
+            emit("        </div>")
 
-        html.extend([
-            "    </div>",
-            "</body>",
-            "</html>"
-        ])
+        emit("    </div>")
+        emit("</body>")
+        emit("</html>")
 
-        return "\n".join(html)
+        if buffer is not None:
+            return buffer.getvalue()
+        return None
 
     def _generate_json_report(self) -> str:
         """
@@ -563,22 +918,35 @@ class FileComparer:
         Returns:
             JSON报告内容
         """
-        import json
+        report = self._build_json_report()
 
+        if HAS_ORJSON:
+            return orjson.dumps(report, option=orjson.OPT_INDENT_2).decode('utf-8')
+        return json.dumps(report, indent=2, ensure_ascii=False)
+
+    def _build_json_report(self) -> Dict:
+        """
+        构建JSON报告的数据结构
+        
+        Returns:
+            报告字典
+        """
         report = {
             "summary": {
                 "identical": len(self.result_summary[CompareResult.IDENTICAL]),
                 "content_diff": len(self.result_summary[CompareResult.CONTENT_DIFF]),
                 "left_only": len(self.result_summary[CompareResult.LEFT_ONLY]),
                 "right_only": len(self.result_summary[CompareResult.RIGHT_ONLY]),
-                "type_diff": len(self.result_summary[CompareResult.TYPE_DIFF])
+                "type_diff": len(self.result_summary[CompareResult.TYPE_DIFF]),
+                "renamed": len(self.result_summary[CompareResult.RENAMED])
             },
             "details": {
                 "identical": self.result_summary[CompareResult.IDENTICAL],
                 "content_diff": self.result_summary[CompareResult.CONTENT_DIFF],
                 "left_only": self.result_summary[CompareResult.LEFT_ONLY],
                 "right_only": self.result_summary[CompareResult.RIGHT_ONLY],
-                "type_diff": self.result_summary[CompareResult.TYPE_DIFF]
+                "type_diff": self.result_summary[CompareResult.TYPE_DIFF],
+                "renamed": self.result_summary[CompareResult.RENAMED]
             },
             "diff_details": {}
         }
@@ -587,7 +955,7 @@ class FileComparer:
         for file_path, diff in self.diff_details.items():
             report["diff_details"][file_path] = diff
 
-        return json.dumps(report, indent=2, ensure_ascii=False)
+        return report
 
 
 def get_file_info(file_path: str) -> Dict:
@@ -636,6 +1004,10 @@ def parse_arguments():
                                help="显示差异上下文的行数（默认: 3）")
     compare_group.add_argument("--binary", action="store_true",
                                help="以二进制模式比较文件")
+    compare_group.add_argument("--threads", type=int, default=None,
+                               help="目录比较的并行线程数（默认: CPU核心数）")
+    compare_group.add_argument("--hash-index", action="store_true",
+                               help="基于内容哈希索引比较目录，可识别重命名或移动的文件")
 
     # 添加过滤选项
     filter_group = parser.add_argument_group("过滤选项")
@@ -680,7 +1052,8 @@ def main():
         ignore_whitespace=args.ignore_whitespace,
         ignore_case=args.ignore_case,
         ignore_blank_lines=args.ignore_blank_lines,
-        context_lines=args.context_lines
+        context_lines=args.context_lines,
+        max_workers=args.threads
     )
 
     # 确定是文件比较还是目录比较
@@ -721,7 +1094,8 @@ def main():
             comparer.compare_directories(
                 args.path1, args.path2,
                 recursive=args.recursive,
-                ignore_patterns=args.ignore
+                ignore_patterns=args.ignore,
+                use_hash_index=args.hash_index
             )
 
             # 生成并显示报告
@@ -737,7 +1111,8 @@ def main():
             if (comparer.result_summary[CompareResult.CONTENT_DIFF] or
                     comparer.result_summary[CompareResult.LEFT_ONLY] or
                     comparer.result_summary[CompareResult.RIGHT_ONLY] or
-                    comparer.result_summary[CompareResult.TYPE_DIFF]):
+                    comparer.result_summary[CompareResult.TYPE_DIFF] or
+                    comparer.result_summary[CompareResult.RENAMED]):
                 return 1
             else:
                 print("目录内容完全相同")
@@ -4,18 +4,29 @@
 文件压缩/解压工具
 
 这个脚本提供了文件和目录的压缩与解压功能，支持多种压缩格式，
-包括zip、tar、tar.gz、tar.bz2等，适用于文件备份、文件共享和存储空间优化。
+包括zip、tar、tar.gz、tar.bz2、tar.zst等，适用于文件备份、文件共享和存储空间优化。
 """
 
 import argparse
+import bz2
+import fnmatch
+import gzip
+import io
 import logging
 import os
-import shutil
+import re
 import sys
 import tarfile
+import threading
+import time
 import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from enum import Enum
-from typing import List, Optional
+from queue import Queue
+from typing import Iterator, List, Optional, Tuple
 
 # 配置日志
 logging.basicConfig(
@@ -25,6 +36,214 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 尝试导入ISA-L加速的deflate实现
+try:
+    from isal import isal_zlib
+    HAS_ISAL = True
+except ImportError:
+    HAS_ISAL = False
+
+# 尝试导入zstandard库（用于TAR.ZST格式）
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# 并行压缩时工作线程每次读取的块大小
+DEFLATE_CHUNK_SIZE = 1024 * 1024
+
+# 超过该大小的文件不在内存中预压缩，而是由主线程直接流式写入ZIP
+PARALLEL_DEFLATE_MAX_SIZE = 64 * 1024 * 1024
+
+# 已经压缩过的文件格式，再用deflate压缩几乎不能减小体积，ZIP中直接存储
+INCOMPRESSIBLE_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp',
+    '.mp4', '.mov', '.mkv', '.mp3', '.ogg',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.7z', '.rar'
+}
+
+# 格式化文件大小使用的单位，相邻单位相差1024倍
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+# 支持的压缩文件扩展名，较长的复合扩展名在前
+ARCHIVE_EXTENSIONS = ('.tar.gz', '.tar.bz2', '.tar.zst', '.tgz', '.zip', '.tar', '.gz', '.bz2', '.zst')
+
+# 解压时复制文件内容使用的缓冲区大小
+COPY_BUFSIZE = 1024 * 1024
+
+# 解压TAR时不超过该大小的文件读入内存后交给线程池写入磁盘
+PARALLEL_WRITE_MAX_SIZE = 16 * 1024 * 1024
+
+# 创建TAR时后台线程预读的文件大小上限和队列长度，更大的文件由主线程直接读取
+TAR_PREFETCH_MAX_SIZE = 16 * 1024 * 1024
+TAR_PREFETCH_QUEUE_SIZE = 8
+
+# 是否可以在内核中直接复制文件数据（Linux的sendfile支持文件到文件的复制）
+HAS_KERNEL_COPY = sys.platform.startswith('linux') and hasattr(os, 'sendfile')
+
+
+def _zipinfo_from_stat(arcname: str, st: os.stat_result) -> zipfile.ZipInfo:
+    """
+    根据遍历目录时已获取的stat信息创建ZipInfo，与ZipInfo.from_file相同但不再调用stat
+    
+    Args:
+        arcname: 文件在ZIP中的路径（使用/分隔）
+        st: 文件的stat信息
+        
+    Returns:
+        文件的ZipInfo
+    """
+    zinfo = zipfile.ZipInfo(arcname, time.localtime(st.st_mtime)[0:6])
+    zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+    zinfo.file_size = st.st_size
+    return zinfo
+
+
+def _deflate_file(file_path: str, zinfo: zipfile.ZipInfo, level: int,
+                  fast: bool = False) -> Tuple[zipfile.ZipInfo, bytes]:
+    """
+    读取文件并压缩为原始deflate数据（不含zlib头），供并行压缩使用
+    
+    zlib在压缩时会释放GIL，因此多个线程可以同时压缩不同的文件。
+    
+    Args:
+        file_path: 文件路径
+        zinfo: 文件的ZipInfo
+        level: 压缩级别
+        fast: 是否使用ISA-L加速的deflate实现（需要安装isal）
+        
+    Returns:
+        (填好CRC和大小的ZipInfo, 压缩后的数据)
+    """
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+
+    if fast:
+        # ISA-L只有0-3四个压缩级别，按比例映射zlib的1-9级
+        backend = isal_zlib
+        level = min(level // 3, 3)
+    else:
+        backend = zlib
+
+    compressor = backend.compressobj(level, backend.DEFLATED, -15)
+    crc = 0
+    file_size = 0
+    chunks = []
+    with open(file_path, 'rb') as f:
+        block = f.read(DEFLATE_CHUNK_SIZE)
+        while block:
+            crc = backend.crc32(block, crc)
+            file_size += len(block)
+            chunks.append(compressor.compress(block))
+            block = f.read(DEFLATE_CHUNK_SIZE)
+    chunks.append(compressor.flush())
+    data = b"".join(chunks)
+
+    zinfo.CRC = crc
+    zinfo.file_size = file_size
+    zinfo.compress_size = len(data)
+    return zinfo, data
+
+
+def _copy_with_buffer(source, target, buffer: bytearray) -> None:
+    """
+    使用预分配的缓冲区把源文件对象的内容复制到目标文件对象
+    
+    Args:
+        source: 可读的二进制文件对象
+        target: 可写的二进制文件对象
+        buffer: 复用的缓冲区
+    """
+    view = memoryview(buffer)
+    n = source.readinto(buffer)
+    while n:
+        target.write(view[:n])
+        n = source.readinto(buffer)
+
+
+def _copy_fd_range(in_fd: int, out_fd: int, offset: int, count: int) -> None:
+    """
+    在内核中把in_fd从offset开始的count字节复制到out_fd的当前位置
+    
+    使用显式偏移读取，不会改变in_fd的文件位置，因此可以在多个线程中
+    同时从同一个文件描述符复制。
+    
+    Args:
+        in_fd: 源文件描述符
+        out_fd: 目标文件描述符
+        offset: 源文件中的起始偏移
+        count: 要复制的字节数
+    """
+    copy_file_range = getattr(os, 'copy_file_range', None)
+    while count > 0:
+        if copy_file_range is not None:
+            try:
+                copied = copy_file_range(in_fd, out_fd, count, offset)
+            except OSError:
+                # 文件系统或内核不支持时改用sendfile
+                copy_file_range = None
+                continue
+        else:
+            copied = os.sendfile(out_fd, in_fd, offset, count)
+
+        if copied == 0:
+            raise EOFError("压缩文件意外结束")
+        offset += copied
+        count -= copied
+
+
+# _write_deflated_entry依赖ZipFile的内部实现（已在CPython 3.8至3.13上验证），
+# 导入时检查类上的内部方法，每个ZipFile实例再检查所需的内部属性；
+# 不满足时回退到串行调用zip_file.write()，避免内部实现变化后静默生成损坏的压缩包
+HAS_ZIP_INTERNALS = hasattr(zipfile.ZipFile, '_writecheck') and hasattr(zipfile.ZipInfo, 'FileHeader')
+ZIP_INTERNAL_ATTRIBUTES = ('_lock', '_seekable', '_didModify', '_allowZip64',
+                           'start_dir', 'fp', 'filelist', 'NameToInfo')
+
+
+def _can_write_deflated_entries(zip_file: zipfile.ZipFile) -> bool:
+    """
+    检查能否向该ZIP文件直接写入预压缩的条目
+    
+    Args:
+        zip_file: 以写模式打开的ZIP文件
+        
+    Returns:
+        ZipFile的内部实现是否符合_write_deflated_entry的预期
+    """
+    return HAS_ZIP_INTERNALS and all(hasattr(zip_file, name) for name in ZIP_INTERNAL_ATTRIBUTES)
+
+
+def _write_deflated_entry(zip_file: zipfile.ZipFile, zinfo: zipfile.ZipInfo, data: bytes) -> None:
+    """
+    将已经压缩好的数据作为一个条目写入ZIP文件，不再重新压缩
+    
+    ZipFile没有写入预压缩数据的公开接口，这里按照ZipFile.open(..., 'w')
+    写入条目的流程写本地文件头和数据，并登记到中央目录。
+    
+    Args:
+        zip_file: 以写模式打开的ZIP文件
+        zinfo: 已填好CRC和大小的条目信息
+        data: 压缩后的数据
+    """
+    zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+    if zip64 and not zip_file._allowZip64:
+        raise zipfile.LargeZipFile("Filesize would require ZIP64 extensions")
+
+    with zip_file._lock:
+        if zip_file._seekable:
+            zip_file.fp.seek(zip_file.start_dir)
+        zinfo.header_offset = zip_file.fp.tell()
+
+        zip_file._writecheck(zinfo)
+        zip_file._didModify = True
+
+        zip_file.fp.write(zinfo.FileHeader(zip64))
+        zip_file.fp.write(data)
+        zip_file.start_dir = zip_file.fp.tell()
+
+        zip_file.filelist.append(zinfo)
+        zip_file.NameToInfo[zinfo.filename] = zinfo
+
 
 class CompressFormat(Enum):
     """压缩格式枚举"""
@@ -32,6 +251,7 @@ class CompressFormat(Enum):
     TAR = "tar"
     TAR_GZ = "tar.gz"
     TAR_BZ2 = "tar.bz2"
+    TAR_ZST = "tar.zst"
 
 
 class FileCompressor:
@@ -39,22 +259,32 @@ class FileCompressor:
 
     def __init__(self,
                  format: CompressFormat = CompressFormat.ZIP,
-                 compression_level: int = 9,
+                 compression_level: int = 6,
                  exclude_patterns: List[str] = None,
-                 include_hidden: bool = False):
+                 include_hidden: bool = False,
+                 max_workers: Optional[int] = None,
+                 use_fast_deflate: bool = True):
         """
         初始化文件压缩器
         
         Args:
             format: 压缩格式
-            compression_level: 压缩级别（0-9，仅适用于ZIP格式）
+            compression_level: 压缩级别（0-9，适用于ZIP、TAR.GZ、TAR.BZ2和TAR.ZST格式），
+                默认6与zlib默认级别相同，比9快一倍以上而文件通常只大不到1%
             exclude_patterns: 要排除的文件模式列表
             include_hidden: 是否包括隐藏文件
+            max_workers: 并行压缩/解压的最大线程数，默认为CPU核心数
+            use_fast_deflate: 安装了isal时是否使用ISA-L加速ZIP压缩
         """
         self.format = format
         self.compression_level = compression_level
         self.exclude_patterns = exclude_patterns or []
+        self._exclude_re = self._compile_exclude_patterns(self.exclude_patterns)
         self.include_hidden = include_hidden
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        # 压缩级别为0时只存储数据，仍使用zlib
+        self.use_fast_deflate = use_fast_deflate and HAS_ISAL and compression_level > 0
 
         # 压缩统计信息
         self.stats = {
@@ -65,6 +295,21 @@ class FileCompressor:
             "errors": 0
         }
 
+    @staticmethod
+    def _compile_exclude_patterns(patterns: List[str]) -> Optional[re.Pattern]:
+        """
+        将所有排除模式编译为一个正则表达式，每个文件名只需匹配一次
+        
+        Args:
+            patterns: 通配符模式列表
+            
+        Returns:
+            编译后的正则表达式，没有排除模式时返回None
+        """
+        if not patterns:
+            return None
+        return re.compile('|'.join(f'(?:{fnmatch.translate(p)})' for p in patterns))
+
     def compress(self, source_path: str, output_path: Optional[str] = None) -> str:
         """
         压缩文件或目录
@@ -98,7 +343,8 @@ class FileCompressor:
             # 根据格式选择压缩方法
             if self.format == CompressFormat.ZIP:
                 self._compress_zip(source_path, output_path)
-            elif self.format in [CompressFormat.TAR, CompressFormat.TAR_GZ, CompressFormat.TAR_BZ2]:
+            elif self.format in [CompressFormat.TAR, CompressFormat.TAR_GZ, CompressFormat.TAR_BZ2,
+                                 CompressFormat.TAR_ZST]:
                 self._compress_tar(source_path, output_path)
 
             # 计算压缩后的大小
@@ -142,10 +388,11 @@ class FileCompressor:
         if output_dir is None:
             # 使用压缩文件名（不含扩展名）作为目录名
             archive_name = os.path.basename(archive_path)
-            # 移除所有可能的扩展名
-            for ext in ['.zip', '.tar', '.gz', '.bz2']:
+            # 移除压缩文件扩展名，复合扩展名优先匹配
+            for ext in ARCHIVE_EXTENSIONS:
                 if archive_name.endswith(ext):
                     archive_name = archive_name[:-len(ext)]
+                    break
             output_dir = archive_name
 
         # 创建输出目录（如果不存在）
@@ -164,7 +411,7 @@ class FileCompressor:
             # 根据文件扩展名判断压缩格式
             if archive_path.endswith('.zip'):
                 self._decompress_zip(archive_path, output_dir, flatten, specific_files)
-            elif any(archive_path.endswith(ext) for ext in ['.tar', '.tar.gz', '.tgz', '.tar.bz2']):
+            elif any(archive_path.endswith(ext) for ext in ['.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.zst']):
                 self._decompress_tar(archive_path, output_dir, flatten, specific_files)
             else:
                 raise ValueError(f"不支持的压缩格式: {archive_path}")
@@ -199,44 +446,16 @@ class FileCompressor:
         files_info = []
 
         try:
-            # 根据文件扩展名判断压缩格式
-            if archive_path.endswith('.zip'):
-                with zipfile.ZipFile(archive_path, 'r') as zip_file:
-                    for info in zip_file.infolist():
-                        file_info = {
-                            'name': info.filename,
-                            'size': info.file_size,
-                            'compressed_size': info.compress_size,
-                            'modified': f"{info.date_time[0]}-{info.date_time[1]:02d}-{info.date_time[2]:02d} "
-                                        f"{info.date_time[3]:02d}:{info.date_time[4]:02d}:{info.date_time[5]:02d}",
-                            'is_dir': info.filename.endswith('/')
-                        }
-                        files_info.append(file_info)
-
-            elif any(archive_path.endswith(ext) for ext in ['.tar', '.tar.gz', '.tgz', '.tar.bz2']):
-                with tarfile.open(archive_path, 'r:*') as tar_file:
-                    for member in tar_file.getmembers():
-                        file_info = {
-                            'name': member.name,
-                            'size': member.size,
-                            'modified': member.mtime,
-                            'is_dir': member.isdir(),
-                            'type': self._get_tarfile_type(member)
-                        }
-                        files_info.append(file_info)
-            else:
-                raise ValueError(f"不支持的压缩格式: {archive_path}")
-
-            # 输出文件列表
-            if verbose:
-                for info in files_info:
+            # 边读取边输出文件列表
+            for info in self._iter_contents(archive_path):
+                if verbose:
                     is_dir = '目录' if info.get('is_dir') else '文件'
                     size_str = self._format_size(info['size'])
                     modified = info.get('modified', 'N/A')
                     logger.info(f"{info['name']} ({is_dir}, {size_str}, 修改时间: {modified})")
-            else:
-                for info in files_info:
+                else:
                     logger.info(info['name'])
+                files_info.append(info)
 
             return files_info
 
@@ -244,6 +463,43 @@ class FileCompressor:
             logger.error(f"列出压缩文件内容时出错: {e}")
             raise
 
+    def _iter_contents(self, archive_path: str) -> Iterator[dict]:
+        """
+        逐个生成压缩文件中条目的信息，不预先读取整个文件列表
+        
+        Args:
+            archive_path: 压缩文件路径
+            
+        Yields:
+            条目信息字典
+        """
+        # 根据文件扩展名判断压缩格式
+        if archive_path.endswith('.zip'):
+            with zipfile.ZipFile(archive_path, 'r') as zip_file:
+                for info in zip_file.infolist():
+                    yield {
+                        'name': info.filename,
+                        'size': info.file_size,
+                        'compressed_size': info.compress_size,
+                        'modified': f"{info.date_time[0]}-{info.date_time[1]:02d}-{info.date_time[2]:02d} "
+                                    f"{info.date_time[3]:02d}:{info.date_time[4]:02d}:{info.date_time[5]:02d}",
+                        'is_dir': info.filename.endswith('/')
+                    }
+
+        elif any(archive_path.endswith(ext) for ext in ['.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.zst']):
+            with self._open_tar_for_reading(archive_path) as tar_file:
+                # 按顺序读取成员，不调用getmembers读取整个列表
+                for member in tar_file:
+                    yield {
+                        'name': member.name,
+                        'size': member.size,
+                        'modified': member.mtime,
+                        'is_dir': member.isdir(),
+                        'type': self._get_tarfile_type(member)
+                    }
+        else:
+            raise ValueError(f"不支持的压缩格式: {archive_path}")
+
     def _compress_zip(self, source_path: str, output_path: str) -> None:
         """使用ZIP格式压缩文件或目录"""
         logger.info(f"正在创建ZIP压缩文件: {output_path}")
@@ -253,57 +509,36 @@ class FileCompressor:
                              compression=zipfile.ZIP_DEFLATED,
                              compresslevel=self.compression_level) as zip_file:
 
-            # 如果源路径是目录，则递归添加所有文件
+            # 如果源路径是目录，则并行压缩所有文件
             if os.path.isdir(source_path):
-                base_dir = os.path.basename(os.path.normpath(source_path))
-
-                for root, dirs, files in os.walk(source_path):
-                    # 过滤隐藏文件和目录
-                    if not self.include_hidden:
-                        dirs[:] = [d for d in dirs if not d.startswith('.')]
-                        files = [f for f in files if not f.startswith('.')]
-
-                    # 过滤排除的文件模式
-                    for pattern in self.exclude_patterns:
-                        import fnmatch
-                        files = [f for f in files if not fnmatch.fnmatch(f, pattern)]
-
-                    # 创建目录项
-                    rel_dir = os.path.relpath(root, os.path.dirname(source_path))
-                    if rel_dir != '.':
-                        zip_dir = os.path.join(base_dir, rel_dir)
-                        zip_file.write(root, zip_dir)
-
-                    # 添加文件
-                    for file in files:
-                        file_path = os.path.join(root, file)
-
-                        try:
-                            # 计算文件在ZIP中的路径
-                            if rel_dir == '.':
-                                zip_path = os.path.join(base_dir, file)
-                            else:
-                                zip_path = os.path.join(base_dir, rel_dir, file)
-
-                            # 添加文件到ZIP
-                            zip_file.write(file_path, zip_path)
-
-                            # 更新统计信息
-                            file_size = os.path.getsize(file_path)
-                            self.stats["files_processed"] += 1
-                            self.stats["total_size_before"] += file_size
-
-                        except Exception as e:
-                            logger.error(f"添加文件 {file_path} 到ZIP时出错: {e}")
-                            self.stats["errors"] += 1
-                            self.stats["skipped_files"] += 1
+                entries = self._iter_tree(source_path)
+
+                if not _can_write_deflated_entries(zip_file):
+                    # 无法直接写入预压缩的条目，逐个文件串行压缩
+                    for entry in entries:
+                        self._write_zip_entry(zip_file, entry, None)
+                    return
+
+                # 工作线程负责读取和压缩，主线程按原顺序写入ZIP，
+                # 同时在途的任务数有上限以控制内存占用
+                window = self.max_workers * 2
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    pending = deque()
+                    for entry in entries:
+                        pending.append((entry, self._submit_deflate(executor, entry)))
+                        if len(pending) >= window:
+                            self._write_zip_entry(zip_file, *pending.popleft())
+
+                    while pending:
+                        self._write_zip_entry(zip_file, *pending.popleft())
             else:
                 # 源路径是单个文件
                 try:
-                    zip_file.write(source_path, os.path.basename(source_path))
+                    zip_file.write(source_path, os.path.basename(source_path),
+                                   compress_type=self._zip_compress_type(source_path))
 
-                    # 更新统计信息
-                    file_size = os.path.getsize(source_path)
+                    # 更新统计信息（大小取自刚写入的条目，无需再次获取文件信息）
+                    file_size = zip_file.filelist[-1].file_size
                     self.stats["files_processed"] += 1
                     self.stats["total_size_before"] += file_size
 
@@ -311,82 +546,283 @@ class FileCompressor:
                     logger.error(f"添加文件 {source_path} 到ZIP时出错: {e}")
                     self.stats["errors"] += 1
 
+    def _submit_deflate(self, executor: ThreadPoolExecutor,
+                        entry: Tuple[str, str, bool, Optional[os.stat_result]]) -> Optional[Future]:
+        """
+        提交文件的压缩任务
+        
+        Args:
+            executor: 线程池
+            entry: (完整路径, 压缩包内路径, 是否为目录, stat信息)
+            
+        Returns:
+            压缩任务，目录和大文件不预压缩，返回None
+        """
+        file_path, arcname, is_dir, st = entry
+
+        # 无法获取信息的文件交给主线程写入时处理并记录错误，
+        # 不压缩直接存储的文件也由主线程写入
+        if (is_dir or st is None or st.st_size > PARALLEL_DEFLATE_MAX_SIZE
+                or self._zip_compress_type(file_path) is not None):
+            return None
+
+        try:
+            zinfo = _zipinfo_from_stat(arcname, st)
+        except ValueError:
+            # 1980年以前的时间戳等ZIP无法表示的情况交给主线程写入时记录错误
+            return None
+
+        return executor.submit(_deflate_file, file_path, zinfo,
+                               self.compression_level, self.use_fast_deflate)
+
+    def _write_zip_entry(self, zip_file: zipfile.ZipFile,
+                         entry: Tuple[str, str, bool, Optional[os.stat_result]],
+                         future: Optional[Future]) -> None:
+        """
+        将一个条目写入ZIP文件
+        
+        Args:
+            zip_file: 以写模式打开的ZIP文件
+            entry: (完整路径, 压缩包内路径, 是否为目录, stat信息)
+            future: 预压缩任务，为None时直接写入
+        """
+        file_path, arcname, is_dir, _ = entry
+
+        # 创建目录项
+        if is_dir:
+            zip_file.write(file_path, arcname)
+            return
+
+        try:
+            if future is None:
+                zip_file.write(file_path, arcname, compress_type=self._zip_compress_type(file_path))
+                file_size = zip_file.filelist[-1].file_size
+            else:
+                zinfo, data = future.result()
+                _write_deflated_entry(zip_file, zinfo, data)
+                file_size = zinfo.file_size
+
+            # 更新统计信息
+            self.stats["files_processed"] += 1
+            self.stats["total_size_before"] += file_size
+
+        except Exception as e:
+            logger.error(f"添加文件 {file_path} 到ZIP时出错: {e}")
+            self.stats["errors"] += 1
+            self.stats["skipped_files"] += 1
+
+    @staticmethod
+    def _zip_compress_type(file_path: str) -> Optional[int]:
+        """
+        根据扩展名确定文件在ZIP中的压缩方式
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            已压缩格式的文件返回ZIP_STORED，其他文件返回None（使用ZIP文件的默认压缩方式）
+        """
+        if os.path.splitext(file_path)[1].lower() in INCOMPRESSIBLE_EXTENSIONS:
+            return zipfile.ZIP_STORED
+        return None
+
+    def _iter_tree(self, source_path: str) -> Iterator[Tuple[str, str, bool, Optional[os.stat_result]]]:
+        """
+        遍历源目录，逐个生成需要压缩的目录和文件（已过滤隐藏文件和排除模式）
+        
+        使用os.scandir单次遍历完成过滤和获取stat信息，压缩包内路径在
+        向下遍历时直接拼接，后续压缩和统计时不再重复获取文件信息。
+        
+        Args:
+            source_path: 源目录路径
+            
+        Yields:
+            按遍历顺序排列的 (完整路径, 压缩包内路径, 是否为目录, stat信息)，
+            目录和无法获取信息的文件stat信息为None
+        """
+        base_dir = os.path.basename(os.path.normpath(source_path))
+        stack = [(source_path, base_dir)]
+
+        while stack:
+            dir_path, arc_dir = stack.pop()
+            yield dir_path, arc_dir, True, None
+
+            # 先读完整个目录再生成条目，尽快关闭目录句柄
+            files = []
+            subdirs = []
+            try:
+                with os.scandir(dir_path) as it:
+                    for entry in it:
+                        name = entry.name
+
+                        # 过滤隐藏文件和目录
+                        if not self.include_hidden and name.startswith('.'):
+                            continue
+
+                        # 子目录稍后处理，不进入符号链接指向的目录
+                        if entry.is_dir():
+                            if not entry.is_symlink():
+                                subdirs.append((entry.path, f"{arc_dir}/{name}"))
+                            continue
+
+                        # 过滤排除的文件模式
+                        if self._exclude_re is not None and self._exclude_re.match(name):
+                            continue
+
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            # 交给写入时处理并记录错误
+                            st = None
+                        files.append((entry.path, f"{arc_dir}/{name}", False, st))
+            except OSError as e:
+                logger.warning(f"无法读取目录 {dir_path}: {e}")
+
+            yield from files
+
+            # 逆序入栈，使子目录按原顺序处理
+            stack.extend(reversed(subdirs))
+
     def _compress_tar(self, source_path: str, output_path: str) -> None:
-        """使用TAR格式（可选GZIP或BZIP2压缩）压缩文件或目录"""
-        # 根据格式选择打开模式
-        if self.format == CompressFormat.TAR:
-            mode = 'w'
-        elif self.format == CompressFormat.TAR_GZ:
-            mode = 'w:gz'
-        elif self.format == CompressFormat.TAR_BZ2:
-            mode = 'w:bz2'
-        else:
+        """使用TAR格式（可选GZIP、BZIP2或Zstandard压缩）压缩文件或目录"""
+        if self.format not in (CompressFormat.TAR, CompressFormat.TAR_GZ,
+                               CompressFormat.TAR_BZ2, CompressFormat.TAR_ZST):
             raise ValueError(f"不支持的TAR压缩格式: {self.format}")
 
         logger.info(f"正在创建{self.format.value}压缩文件: {output_path}")
 
         # 创建TAR文件
-        with tarfile.open(output_path, mode) as tar_file:
+        with self._open_tar_for_writing(output_path) as tar_file:
             # 如果源路径是目录，则递归添加所有文件
             if os.path.isdir(source_path):
-                base_dir = os.path.basename(os.path.normpath(source_path))
+                self._add_tree_to_tar(tar_file, source_path, output_path)
+            else:
+                # 源路径是单个文件
+                try:
+                    tar_file.add(source_path, arcname=os.path.basename(source_path))
 
-                for root, dirs, files in os.walk(source_path):
-                    # 过滤隐藏文件和目录
-                    if not self.include_hidden:
-                        dirs[:] = [d for d in dirs if not d.startswith('.')]
-                        files = [f for f in files if not f.startswith('.')]
+                    # 更新统计信息（大小取自刚添加的成员，无需再次获取文件信息）
+                    self.stats["files_processed"] += 1
+                    self.stats["total_size_before"] += tar_file.members[-1].size
 
-                    # 过滤排除的文件模式
-                    for pattern in self.exclude_patterns:
-                        import fnmatch
-                        files = [f for f in files if not fnmatch.fnmatch(f, pattern)]
+                except Exception as e:
+                    logger.error(f"添加文件 {source_path} 到TAR时出错: {e}")
+                    self.stats["errors"] += 1
 
-                    # 添加文件
-                    for file in files:
-                        file_path = os.path.join(root, file)
+    def _add_tree_to_tar(self, tar_file: tarfile.TarFile, source_path: str, output_path: str) -> None:
+        """
+        将目录中的所有文件添加到TAR
+        
+        后台线程遍历目录、获取文件信息并读取文件内容，主线程只负责写入TAR
+        （包括压缩），读取磁盘和压缩可以同时进行。
+        
+        Args:
+            tar_file: 以写模式打开的TAR文件
+            source_path: 源目录路径
+            output_path: 正在写入的压缩文件路径，遍历时跳过
+        """
+        output_stat = os.stat(output_path)
+        queue = Queue(maxsize=TAR_PREFETCH_QUEUE_SIZE)
+        stop = threading.Event()
+        reader = threading.Thread(target=self._prefetch_tar_entries,
+                                  args=(tar_file, source_path, (output_stat.st_dev, output_stat.st_ino),
+                                        queue, stop),
+                                  daemon=True)
+        reader.start()
+
+        finished = False
+        try:
+            while True:
+                item = queue.get()
+                if item is None:
+                    finished = True
+                    break
 
-                        try:
-                            # 计算文件在TAR中的路径
-                            rel_path = os.path.relpath(file_path, os.path.dirname(source_path))
-                            tar_path = os.path.join(base_dir, os.path.relpath(rel_path, base_dir))
-
-                            # 添加文件到TAR
-                            tar_file.add(file_path, arcname=tar_path)
-
-                            # 更新统计信息
-                            file_size = os.path.getsize(file_path)
-                            self.stats["files_processed"] += 1
-                            self.stats["total_size_before"] += file_size
-
-                        except Exception as e:
-                            logger.error(f"添加文件 {file_path} 到TAR时出错: {e}")
-                            self.stats["errors"] += 1
-                            self.stats["skipped_files"] += 1
-            else:
-                # 源路径是单个文件
+                file_path, tarinfo, data, error = item
                 try:
-                    tar_file.add(source_path, arcname=os.path.basename(source_path))
+                    if error is not None:
+                        raise error
+
+                    # 添加文件到TAR，未预读的大文件直接从磁盘读取
+                    if data is not None:
+                        tar_file.addfile(tarinfo, io.BytesIO(data))
+                    elif tarinfo.isreg():
+                        with open(file_path, 'rb') as f:
+                            tar_file.addfile(tarinfo, f)
+                    else:
+                        tar_file.addfile(tarinfo)
 
                     # 更新统计信息
-                    file_size = os.path.getsize(source_path)
                     self.stats["files_processed"] += 1
-                    self.stats["total_size_before"] += file_size
+                    self.stats["total_size_before"] += tarinfo.size
 
                 except Exception as e:
-                    logger.error(f"添加文件 {source_path} 到TAR时出错: {e}")
+                    logger.error(f"添加文件 {file_path} 到TAR时出错: {e}")
                     self.stats["errors"] += 1
+                    self.stats["skipped_files"] += 1
+        finally:
+            # 提前结束时通知后台线程停止，并取走队列中的数据使其不再阻塞
+            if not finished:
+                stop.set()
+                while queue.get() is not None:
+                    pass
+            reader.join()
+
+    def _prefetch_tar_entries(self, tar_file: tarfile.TarFile, source_path: str,
+                              output_id: Tuple[int, int], queue: Queue, stop: threading.Event) -> None:
+        """
+        遍历目录并读取文件内容（在后台线程中执行）
+        
+        Args:
+            tar_file: 以写模式打开的TAR文件，用于生成TarInfo
+            source_path: 源目录路径
+            output_id: 正在写入的压缩文件的 (设备号, inode)
+            queue: 传给主线程的 (文件路径, TarInfo, 文件内容, 错误) 队列，结束时放入None
+            stop: 主线程要求提前停止的事件
+        """
+        try:
+            for file_path, tar_path, is_dir, st in self._iter_tree(source_path):
+                if stop.is_set():
+                    break
+
+                # 只添加文件，并跳过正在写入的压缩文件本身
+                if is_dir or (st is not None and (st.st_dev, st.st_ino) == output_id):
+                    continue
+
+                try:
+                    tarinfo = tar_file.gettarinfo(file_path, arcname=tar_path)
+
+                    # 不支持的文件类型（如套接字）
+                    if tarinfo is None:
+                        continue
+
+                    data = None
+                    if tarinfo.isreg() and tarinfo.size <= TAR_PREFETCH_MAX_SIZE:
+                        with open(file_path, 'rb') as f:
+                            data = f.read(tarinfo.size)
+                        if len(data) != tarinfo.size:
+                            raise OSError("文件在读取过程中被修改")
+
+                    queue.put((file_path, tarinfo, data, None))
+                except Exception as e:
+                    queue.put((file_path, None, None, e))
+        finally:
+            queue.put(None)
 
     def _decompress_zip(self, archive_path: str, output_dir: str,
                         flatten: bool = False, specific_files: List[str] = None) -> None:
         """解压ZIP文件"""
+        # 所有文件复用同一个复制缓冲区
+        buffer = bytearray(COPY_BUFSIZE)
+
         with zipfile.ZipFile(archive_path, 'r') as zip_file:
             # 获取文件列表
             file_list = zip_file.namelist()
 
-            # 如果指定了特定文件，则过滤列表
+            # 如果指定了特定文件，则过滤列表（startswith接受元组，一次调用匹配所有前缀）
             if specific_files:
-                file_list = [f for f in file_list if any(f.startswith(sf) for sf in specific_files)]
+                prefixes = tuple(specific_files)
+                file_list = [f for f in file_list if f.startswith(prefixes)]
 
             # 提取文件
             for file in file_list:
@@ -411,7 +847,7 @@ class FileCompressor:
 
                     # 提取文件
                     with zip_file.open(file) as source, open(output_path, 'wb') as target:
-                        shutil.copyfileobj(source, target)
+                        _copy_with_buffer(source, target, buffer)
 
                     # 更新统计信息
                     self.stats["files_processed"] += 1
@@ -423,17 +859,46 @@ class FileCompressor:
 
     def _decompress_tar(self, archive_path: str, output_dir: str,
                         flatten: bool = False, specific_files: List[str] = None) -> None:
-        """解压TAR文件（包括TAR.GZ和TAR.BZ2）"""
-        with tarfile.open(archive_path, 'r:*') as tar_file:
-            # 获取文件列表
-            members = tar_file.getmembers()
-
-            # 如果指定了特定文件，则过滤列表
-            if specific_files:
-                members = [m for m in members if any(m.name.startswith(sf) for sf in specific_files)]
+        """解压TAR文件（包括TAR.GZ、TAR.BZ2和TAR.ZST）"""
+        # 所有文件复用同一个复制缓冲区
+        buffer = bytearray(COPY_BUFSIZE)
+
+        # 已创建的目录，避免对同一目录重复调用makedirs
+        dirs_made = set()
+
+        # TAR流不能被多个线程同时读取，因此由主线程读出文件内容，
+        # 交给线程池写入磁盘；限制在途任务数以控制内存占用
+        slots = threading.BoundedSemaphore(self.max_workers * 4)
+        jobs = []
+
+        # 每个输出路径最近一次提交的后台写入；同一路径再次写入前需等它完成，
+        # 保证与顺序解压一样由后出现的成员覆盖先出现的成员
+        pending_writes = {}
+        output_root = os.path.abspath(output_dir)
+
+        # startswith接受元组，一次调用匹配所有前缀
+        prefixes = tuple(specific_files) if specific_files else None
+
+        with self._open_tar_for_reading(archive_path) as tar_file, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # 未压缩的TAR中文件数据按原样存放，可以按偏移在内核中直接复制
+            archive_fd = None
+            if HAS_KERNEL_COPY and isinstance(tar_file.fileobj, io.BufferedReader):
+                archive_fd = tar_file.fileobj.fileno()
+
+                # 成员按偏移顺序排列，复制基本是顺序读取，提示内核加大预读
+                if hasattr(os, 'posix_fadvise'):
+                    try:
+                        os.posix_fadvise(archive_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    except OSError:
+                        pass
+
+            # 按顺序读取成员并提取，不预先调用getmembers扫描整个压缩文件
+            for member in tar_file:
+                # 如果指定了特定文件，则跳过其他成员
+                if prefixes is not None and not member.name.startswith(prefixes):
+                    continue
 
-            # 提取文件
-            for member in members:
                 try:
                     # 确定输出路径
                     if flatten:
@@ -445,17 +910,44 @@ class FileCompressor:
                     else:
                         output_path = os.path.join(output_dir, member.name)
 
+                    # 拒绝解压到输出目录之外的路径（绝对路径或包含..）
+                    if not self._is_within_directory(output_root, output_path):
+                        logger.warning(f"跳过不安全的路径: {member.name}")
+                        self.stats["skipped_files"] += 1
+                        continue
+
                     # 如果是目录，只创建目录
                     if member.isdir():
-                        os.makedirs(output_path, exist_ok=True)
+                        self._ensure_dir(output_path, dirs_made)
                         continue
 
                     # 确保目标目录存在
-                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                    self._ensure_dir(os.path.dirname(output_path), dirs_made)
+
+                    # 普通文件直接从压缩文件中按偏移复制，无需经过Python缓冲区
+                    if archive_fd is not None and member.isreg() and not member.issparse():
+                        self._wait_pending_write(pending_writes, output_path)
+                        future = executor.submit(self._copy_member_range, archive_fd,
+                                                 member.offset_data, member.size, output_path)
+                        pending_writes[output_path] = future
+                        jobs.append((member.name, future))
+                        continue
 
                     # 提取文件
-                    with tar_file.extractfile(member) as source, open(output_path, 'wb') as target:
-                        shutil.copyfileobj(source, target)
+                    with tar_file.extractfile(member) as source:
+                        self._wait_pending_write(pending_writes, output_path)
+
+                        if member.size <= PARALLEL_WRITE_MAX_SIZE:
+                            data = source.read()
+                            slots.acquire()
+                            future = executor.submit(self._write_payload, output_path, data, slots)
+                            pending_writes[output_path] = future
+                            jobs.append((member.name, future))
+                            continue
+
+                        # 大文件直接在主线程中流式写入
+                        with open(output_path, 'wb') as target:
+                            _copy_with_buffer(source, target, buffer)
 
                     # 更新统计信息
                     self.stats["files_processed"] += 1
@@ -465,21 +957,195 @@ class FileCompressor:
                     self.stats["errors"] += 1
                     self.stats["skipped_files"] += 1
 
+        # 汇总后台写入的结果
+        for name, future in jobs:
+            try:
+                future.result()
+                self.stats["files_processed"] += 1
+            except Exception as e:
+                logger.error(f"解压文件 {name} 时出错: {e}")
+                self.stats["errors"] += 1
+                self.stats["skipped_files"] += 1
+
+    @contextmanager
+    def _open_tar_for_writing(self, output_path: str):
+        """
+        按当前格式打开TAR文件用于写入
+        
+        输出文件使用大缓冲区，添加文件时按大块复制数据。
+        
+        Args:
+            output_path: 输出文件路径
+            
+        Yields:
+            打开的TarFile对象
+        """
+        if self.format == CompressFormat.TAR_ZST and not HAS_ZSTD:
+            raise ImportError("未安装zstandard库，无法使用TAR.ZST格式。可通过运行 pip install zstandard 安装。")
+
+        with open(output_path, 'wb', buffering=COPY_BUFSIZE) as raw_file:
+            if self.format == CompressFormat.TAR_ZST:
+                # zstd的压缩级别范围是1-22，并使用多个线程同时压缩
+                compressor = zstandard.ZstdCompressor(level=min(self.compression_level * 2, 22),
+                                                      threads=self.max_workers)
+                with compressor.stream_writer(raw_file, closefd=False) as stream, \
+                        tarfile.open(fileobj=stream, mode='w|', bufsize=COPY_BUFSIZE,
+                                     copybufsize=COPY_BUFSIZE) as tar_file:
+                    yield tar_file
+                return
+
+            # 根据格式选择打开模式和压缩级别
+            options = {}
+            if self.format == CompressFormat.TAR:
+                mode = 'w'
+            elif self.format == CompressFormat.TAR_GZ:
+                mode = 'w:gz'
+                options['compresslevel'] = self.compression_level
+            else:
+                mode = 'w:bz2'
+                # BZIP2的压缩级别范围是1-9
+                options['compresslevel'] = max(self.compression_level, 1)
+
+            with tarfile.open(fileobj=raw_file, mode=mode, copybufsize=COPY_BUFSIZE, **options) as tar_file:
+                yield tar_file
+
+    @staticmethod
+    @contextmanager
+    def _open_tar_for_reading(archive_path: str):
+        """
+        打开TAR文件用于读取
+        
+        GZIP和BZIP2压缩的TAR由解压流直接读取无缓冲的原始文件，
+        避免在文件和解压流之间多一层缓冲区复制；其他TAR文件使用
+        大缓冲区打开并自动检测压缩格式。TAR.ZST只能按顺序流式读取。
+        
+        Args:
+            archive_path: 压缩文件路径
+            
+        Yields:
+            打开的TarFile对象
+        """
+        if archive_path.endswith('.zst'):
+            if not HAS_ZSTD:
+                raise ImportError("未安装zstandard库，无法读取TAR.ZST文件。可通过运行 pip install zstandard 安装。")
+
+            decompressor = zstandard.ZstdDecompressor()
+            with open(archive_path, 'rb', buffering=0) as raw_file, \
+                    decompressor.stream_reader(raw_file, closefd=False) as stream, \
+                    tarfile.open(fileobj=stream, mode='r|', bufsize=COPY_BUFSIZE,
+                                 copybufsize=COPY_BUFSIZE) as tar_file:
+                yield tar_file
+            return
+
+        if not archive_path.endswith(('.gz', '.tgz', '.bz2')):
+            with open(archive_path, 'rb', buffering=COPY_BUFSIZE) as raw_file, \
+                    tarfile.open(fileobj=raw_file, mode='r:*', copybufsize=COPY_BUFSIZE) as tar_file:
+                yield tar_file
+            return
+
+        with open(archive_path, 'rb', buffering=0) as raw_file:
+            if archive_path.endswith('.bz2'):
+                stream = bz2.BZ2File(raw_file, 'rb')
+            else:
+                stream = gzip.GzipFile(fileobj=raw_file, mode='rb')
+
+            with stream, tarfile.open(fileobj=stream, mode='r:', copybufsize=COPY_BUFSIZE) as tar_file:
+                yield tar_file
+
+    @staticmethod
+    def _copy_member_range(archive_fd: int, offset: int, size: int, output_path: str) -> None:
+        """
+        将未压缩TAR中的文件数据在内核中直接复制到输出文件（在线程池中执行）
+        
+        Args:
+            archive_fd: 压缩文件的文件描述符
+            offset: 文件数据在压缩文件中的偏移
+            size: 文件大小
+            output_path: 输出文件路径
+        """
+        with open(output_path, 'wb') as target:
+            _copy_fd_range(archive_fd, target.fileno(), offset, size)
+
+    @staticmethod
+    def _wait_pending_write(pending_writes: dict, output_path: str) -> None:
+        """
+        等待同一输出路径上尚未完成的后台写入
+        
+        只等待不取结果，写入出错时仍由调用方汇总jobs时统一记录。
+        
+        Args:
+            pending_writes: 输出路径到最近一次写入任务的映射
+            output_path: 即将写入的输出路径
+        """
+        previous = pending_writes.pop(output_path, None)
+        if previous is not None:
+            wait((previous,))
+
+    @staticmethod
+    def _write_payload(output_path: str, data: bytes, slots: threading.BoundedSemaphore) -> None:
+        """
+        将文件内容写入磁盘（在线程池中执行）
+        
+        Args:
+            output_path: 输出文件路径
+            data: 文件内容
+            slots: 限制在途任务数的信号量，写入完成后释放
+        """
+        try:
+            with open(output_path, 'wb') as target:
+                target.write(data)
+        finally:
+            slots.release()
+
+    @staticmethod
+    def _ensure_dir(path: str, dirs_made: set) -> None:
+        """
+        确保目录存在，已创建过的目录不再重复调用makedirs
+        
+        Args:
+            path: 目录路径
+            dirs_made: 已创建目录的集合
+        """
+        if path and path not in dirs_made:
+            os.makedirs(path, exist_ok=True)
+            dirs_made.add(path)
+
+    @staticmethod
+    def _is_within_directory(directory: str, path: str) -> bool:
+        """
+        检查路径规范化后是否位于指定目录之内
+        
+        Args:
+            directory: 目录的绝对路径
+            path: 待检查的路径
+            
+        Returns:
+            是否位于目录之内
+        """
+        abs_path = os.path.abspath(path)
+        return abs_path == directory or abs_path.startswith(directory + os.sep)
+
     def _format_size(self, size_bytes: int) -> str:
         """将字节大小格式化为易读的字符串"""
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size_bytes < 1024.0 or unit == 'TB':
-                return f"{size_bytes:.2f} {unit}"
-            size_bytes /= 1024.0
+        if size_bytes < 1024:
+            return f"{size_bytes:.2f} B"
+
+        # 每个单位相差2^10倍，由二进制位数直接确定单位
+        index = min((size_bytes.bit_length() - 1) // 10, len(SIZE_UNITS) - 1)
+        return f"{size_bytes / (1 << (10 * index)):.2f} {SIZE_UNITS[index]}"
 
     def _get_directory_size(self, directory: str) -> int:
         """计算目录的总大小（字节）"""
         total_size = 0
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                file_path = os.path.join(root, file)
-                if os.path.isfile(file_path):
-                    total_size += os.path.getsize(file_path)
+        stack = [directory]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    # 目录项缓存了类型和stat信息，无需再次调用stat
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        total_size += entry.stat().st_size
         return total_size
 
     def _get_tarfile_type(self, member: tarfile.TarInfo) -> str:
@@ -521,14 +1187,21 @@ def parse_arguments():
 
     # 压缩选项
     format_group = parser.add_argument_group('压缩选项')
-    format_group.add_argument('-f', '--format', choices=['zip', 'tar', 'tar.gz', 'tar.bz2'],
+    format_group.add_argument('-f', '--format', choices=['zip', 'tar', 'tar.gz', 'tar.bz2', 'tar.zst'],
                               default='zip', help='压缩格式（默认: zip）')
-    format_group.add_argument('--level', type=int, choices=range(10), default=9,
-                              help='压缩级别 0-9，9为最高压缩率（仅用于ZIP格式，默认: 9）')
+    format_group.add_argument('--level', type=int, choices=range(10), default=6,
+                              help='压缩级别 0-9，6为速度与压缩率的平衡点，9为最高压缩率'
+                                   '（用于ZIP、TAR.GZ、TAR.BZ2和TAR.ZST格式，默认: 6）')
+    format_group.add_argument('--fast', action='store_true',
+                              help='使用最快的压缩级别（等同于 --level 1）')
     format_group.add_argument('-e', '--exclude', nargs='+',
                               help='要排除的文件模式列表（如 *.tmp *.log）')
     format_group.add_argument('--include-hidden', action='store_true',
                               help='包括隐藏文件')
+    format_group.add_argument('--threads', type=int, default=None,
+                              help='并行处理的线程数（用于ZIP压缩和TAR解压，默认: CPU核心数）')
+    format_group.add_argument('--no-fast-deflate', action='store_true',
+                              help='不使用ISA-L加速ZIP压缩（仅在安装了isal时有效）')
 
     # 解压选项
     extract_group = parser.add_argument_group('解压选项')
@@ -552,9 +1225,11 @@ def main():
         # 创建压缩器实例
         compressor = FileCompressor(
             format=CompressFormat(args.format) if args.compress else None,
-            compression_level=args.level,
+            compression_level=1 if args.fast else args.level,
             exclude_patterns=args.exclude or [],
-            include_hidden=args.include_hidden
+            include_hidden=args.include_hidden,
+            max_workers=args.threads,
+            use_fast_deflate=not args.no_fast_deflate
         )
 
         # 执行操作
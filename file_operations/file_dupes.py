@@ -8,15 +8,19 @@
 """
 
 import argparse
+import array
+import fnmatch
 import hashlib
 import logging
 import os
+import re
 import shutil
 import sys
 import time
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 # 配置日志
 logging.basicConfig(
@@ -26,6 +30,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 预筛选时从文件开头和结尾各读取的字节数
+HEAD_SAMPLE_SIZE = 4096
+
+# 计算完整哈希值时每次读取的块大小，较大的块减少Python与C之间的调用次数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 逐字节比较时的初始块大小和上限：先读小块以便尽早发现差异，之后逐步加倍
+COMPARE_MIN_CHUNK_SIZE = 4096
+COMPARE_MAX_CHUNK_SIZE = 64 * 1024
+
+# Python 3.11+ 提供在hashlib内部完成读取和计算的file_digest
+HAS_FILE_DIGEST = hasattr(hashlib, 'file_digest')
+
+# Linux等系统支持向内核提示文件的访问方式
+HAS_FADVISE = hasattr(os, 'posix_fadvise')
+
+# macOS的APFS在读取同一卷的目录时存在内核锁竞争，线程过多反而变慢
+MAX_SCAN_WORKERS_DARWIN = 4
+
+
+def _fadvise(fd: int, advice: str) -> None:
+    """
+    向内核提示整个文件的访问方式，不支持的系统上不做任何操作
+    
+    Args:
+        fd: 文件描述符
+        advice: os模块中的提示常量名，如 'POSIX_FADV_SEQUENTIAL'
+    """
+    if HAS_FADVISE:
+        try:
+            os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+        except OSError:
+            pass
+
 
 class CompareMethod(Enum):
     """文件比较方法枚举"""
@@ -39,6 +77,16 @@ class HashAlgorithm(Enum):
     MD5 = "md5"  # MD5算法（较快，但安全性较低）
     SHA1 = "sha1"  # SHA1算法
     SHA256 = "sha256"  # SHA256算法（较慢，但安全性高）
+    BLAKE2B = "blake2b"  # BLAKE2b算法（在64位CPU上比MD5更快，安全性高，默认）
+
+
+# 各哈希算法对应的构造函数
+HASH_CONSTRUCTORS = {
+    HashAlgorithm.MD5: hashlib.md5,
+    HashAlgorithm.SHA1: hashlib.sha1,
+    HashAlgorithm.SHA256: hashlib.sha256,
+    HashAlgorithm.BLAKE2B: hashlib.blake2b,
+}
 
 
 class DuplicateAction(Enum):
@@ -56,11 +104,12 @@ class DuplicateFinder:
 
     def __init__(self,
                  compare_method: CompareMethod = CompareMethod.HASH,
-                 hash_algorithm: HashAlgorithm = HashAlgorithm.MD5,
+                 hash_algorithm: HashAlgorithm = HashAlgorithm.BLAKE2B,
                  min_size: int = 1,
                  exclude_patterns: List[str] = None,
                  include_hidden: bool = False,
-                 follow_symlinks: bool = False):
+                 follow_symlinks: bool = False,
+                 max_workers: Optional[int] = None):
         """
         初始化重复文件查找器
         
@@ -71,17 +120,29 @@ class DuplicateFinder:
             exclude_patterns: 要排除的文件模式列表
             include_hidden: 是否包括隐藏文件
             follow_symlinks: 是否跟随符号链接
+            max_workers: 并行扫描目录和计算哈希值的最大线程数，默认为CPU核心数的两倍（最多32）
         """
         self.compare_method = compare_method
         self.hash_algorithm = hash_algorithm
         self.min_size = min_size
         self.exclude_patterns = exclude_patterns or []
+        self._exclude_re = self._compile_exclude_patterns(self.exclude_patterns)
         self.include_hidden = include_hidden
         self.follow_symlinks = follow_symlinks
 
+        # hashlib在计算时会释放GIL，读取文件时也会等待IO，线程数可以多于CPU核心数
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 2)
+
+        # 创建哈希对象的构造函数在初始化时确定，避免每个文件都判断一次算法
+        if hash_algorithm not in HASH_CONSTRUCTORS:
+            raise ValueError(f"不支持的哈希算法: {hash_algorithm}")
+        self._new_hasher = HASH_CONSTRUCTORS[hash_algorithm]
+
         # 查找结果
         self.size_groups = defaultdict(list)  # 按大小分组的文件
         self.duplicate_groups = []  # 重复文件组
+        # 与重复文件组一一对应的文件大小，紧凑存储为64位整数数组
+        self.duplicate_group_sizes = array.array('q')
         self.total_duplicates = 0  # 重复文件总数
         self.wasted_space = 0  # 浪费的空间（字节）
 
@@ -98,12 +159,24 @@ class DuplicateFinder:
             "skipped_files": 0
         }
 
-        # 缓存已计算的文件哈希值
-        self._hash_cache = {}
-
         # 扫描开始时间
         self.start_time = 0
 
+    @staticmethod
+    def _compile_exclude_patterns(patterns: List[str]) -> Optional[re.Pattern]:
+        """
+        将所有排除模式编译为一个正则表达式，每个文件名只需匹配一次
+        
+        Args:
+            patterns: 通配符模式列表
+            
+        Returns:
+            编译后的正则表达式，没有排除模式时返回None
+        """
+        if not patterns:
+            return None
+        return re.compile('|'.join(f'(?:{fnmatch.translate(p)})' for p in patterns))
+
     def find_duplicates(self, directories: List[str], recursive: bool = True) -> List[List[str]]:
         """
         在指定目录中查找重复文件
@@ -133,12 +206,14 @@ class DuplicateFinder:
         # 清空之前的结果
         self.size_groups.clear()
         self.duplicate_groups.clear()
-        self._hash_cache.clear()
+        self.duplicate_group_sizes = array.array('q')
 
         logger.info(f"开始查找重复文件...")
         logger.info(f"比较方法: {self.compare_method.value}")
         if self.compare_method == CompareMethod.HASH:
             logger.info(f"哈希算法: {self.hash_algorithm.value}")
+            if type(self._new_hasher()).__module__ == '_hashlib':
+                logger.debug("哈希计算由OpenSSL实现，可利用CPU的SHA指令扩展加速")
         logger.info(f"最小文件大小: {self._format_size(self.min_size)}")
 
         # 第一步：扫描文件并按大小分组
@@ -153,13 +228,24 @@ class DuplicateFinder:
         logger.info(f"找到 {len(potential_duplicates)} 组可能的重复文件（按大小分组）")
 
         # 第三步：进一步比较文件内容确认重复
-        self._find_exact_duplicates(potential_duplicates)
+        if self.compare_method == CompareMethod.SIZE:
+            # 仅按大小比较时，每个大小相同的组就是结果，无需读取文件
+            self.duplicate_groups.extend(potential_duplicates.values())
+            self.duplicate_group_sizes.extend(potential_duplicates)
+        else:
+            self._find_exact_duplicates(potential_duplicates)
+
+        # 计算统计信息（一次遍历同时统计重复文件数和浪费的空间）
+        duplicate_files = 0
+        wasted_space = 0
+        for group, group_size in zip(self.duplicate_groups, self.duplicate_group_sizes):
+            copies = len(group) - 1
+            duplicate_files += copies
+            wasted_space += copies * group_size
 
-        # 计算统计信息
         self.stats["duplicate_groups"] = len(self.duplicate_groups)
-        self.stats["duplicate_files"] = sum(len(group) - 1 for group in self.duplicate_groups)
-        self.stats["wasted_space"] = sum((len(group) - 1) * os.path.getsize(group[0])
-                                         for group in self.duplicate_groups)
+        self.stats["duplicate_files"] = duplicate_files
+        self.stats["wasted_space"] = wasted_space
 
         # 记录查找结果
         elapsed_time = time.time() - self.start_time
@@ -199,7 +285,8 @@ class DuplicateFinder:
         processed_files = 0
         saved_space = 0
 
-        for group_idx, file_group in enumerate(self.duplicate_groups):
+        for group_idx, (file_group, original_size) in enumerate(zip(self.duplicate_groups,
+                                                                    self.duplicate_group_sizes)):
             # 保留第一个文件，处理其余文件
             original_file = file_group[0]
             duplicates = file_group[1:]
@@ -207,9 +294,6 @@ class DuplicateFinder:
             if not duplicates:
                 continue
 
-            # 获取原始文件大小
-            original_size = os.path.getsize(original_file)
-
             logger.info(f"处理重复组 #{group_idx + 1}: {len(duplicates)} 个副本，"
                         f"每个 {self._format_size(original_size)}")
             logger.info(f"  保留: {original_file}")
@@ -327,7 +411,13 @@ class DuplicateFinder:
         return report
 
     def _scan_directory(self, directory: str, recursive: bool) -> None:
-        """扫描目录，收集文件信息"""
+        """
+        扫描目录，收集文件信息
+        
+        每个目录交给线程池中的一个任务读取，发现的子目录再提交为新任务，
+        多个目录同时读取可以充分利用磁盘的并发能力。所有目录读取完成后，
+        按照os.walk自顶向下的顺序汇总文件，保证结果顺序与单线程遍历一致。
+        """
         try:
             directory = os.path.abspath(directory)
 
@@ -337,186 +427,303 @@ class DuplicateFinder:
 
             logger.info(f"扫描目录: {directory}")
 
-            for root, dirs, files in os.walk(directory, followlinks=self.follow_symlinks):
-                # 过滤隐藏文件和目录
-                if not self.include_hidden:
-                    dirs[:] = [d for d in dirs if not d.startswith('.')]
-                    files = [f for f in files if not f.startswith('.')]
+            max_workers = self.max_workers
+            if sys.platform == 'darwin':
+                max_workers = min(max_workers, MAX_SCAN_WORKERS_DARWIN)
+
+            # 目录路径 -> (文件列表, 子目录列表)
+            listings = {}
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pending = {executor.submit(self._list_directory, directory): directory}
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path = pending.pop(future)
+                        files, subdirs, errors = future.result()
+                        listings[path] = (files, subdirs)
+                        self.stats["errors"] += errors
+
+                        if recursive:
+                            for subdir in subdirs:
+                                pending[executor.submit(self._list_directory, subdir)] = subdir
+
+            # 按深度优先顺序汇总各目录中的文件
+            stack = [directory]
+            while stack:
+                files, subdirs = listings[stack.pop()]
+                for file_path, file_size in files:
+                    # 跳过小于最小大小的文件
+                    if file_size < self.min_size:
+                        self.stats["skipped_files"] += 1
+                        continue
+
+                    # 按大小分组
+                    self.size_groups[file_size].append(file_path)
+
+                    # 更新统计信息
+                    self.stats["total_files"] += 1
+                    self.stats["total_size"] += file_size
+
+                if recursive:
+                    stack.extend(reversed(subdirs))
 
-                # 过滤排除的文件模式
-                for pattern in self.exclude_patterns:
-                    import fnmatch
-                    files = [f for f in files if not fnmatch.fnmatch(f, pattern)]
+        except Exception as e:
+            logger.error(f"扫描目录 {directory} 时出错: {e}")
+            self.stats["errors"] += 1
+
+    def _list_directory(self, path: str) -> Tuple[List[Tuple[str, int]], List[str], int]:
+        """
+        读取单个目录的内容（在线程池中执行）
+        
+        os.scandir返回的DirEntry缓存了文件类型和stat结果，
+        无需再对每个文件分别调用isfile和getsize。
+        
+        Args:
+            path: 目录路径
+            
+        Returns:
+            ([(文件路径, 文件大小)], [子目录路径], 出错次数)
+        """
+        files = []
+        subdirs = []
+        errors = 0
+
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    # 过滤隐藏文件和目录
+                    if not self.include_hidden and entry.name.startswith('.'):
+                        continue
 
-                # 处理文件
-                for filename in files:
                     try:
-                        file_path = os.path.join(root, filename)
+                        if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                            subdirs.append(entry.path)
+                            continue
 
                         # 跳过非常规文件
-                        if not os.path.isfile(file_path):
+                        if not entry.is_file(follow_symlinks=self.follow_symlinks):
                             continue
 
-                        # 获取文件大小
-                        file_size = os.path.getsize(file_path)
-
-                        # 跳过小于最小大小的文件
-                        if file_size < self.min_size:
-                            self.stats["skipped_files"] += 1
+                        # 过滤排除的文件模式
+                        if self._exclude_re is not None and self._exclude_re.match(entry.name):
                             continue
 
-                        # 按大小分组
-                        self.size_groups[file_size].append(file_path)
-
-                        # 更新统计信息
-                        self.stats["total_files"] += 1
-                        self.stats["total_size"] += file_size
+                        files.append((entry.path, entry.stat(follow_symlinks=self.follow_symlinks).st_size))
 
                     except Exception as e:
-                        logger.error(f"处理文件 {os.path.join(root, filename)} 时出错: {e}")
-                        self.stats["errors"] += 1
-
-                # 如果不递归，则清空子目录列表
-                if not recursive:
-                    dirs.clear()
+                        logger.error(f"处理文件 {entry.path} 时出错: {e}")
+                        errors += 1
 
         except Exception as e:
-            logger.error(f"扫描目录 {directory} 时出错: {e}")
-            self.stats["errors"] += 1
+            logger.error(f"扫描目录 {path} 时出错: {e}")
+            errors += 1
 
-    def _find_exact_duplicates(self, potential_duplicates: Dict[int, List[str]]) -> None:
-        """通过比较文件内容找出精确的重复文件"""
-        total_groups = len(potential_duplicates)
-        processed_groups = 0
-
-        for size, files in potential_duplicates.items():
-            processed_groups += 1
-            if len(files) < 2:
-                continue
+        return files, subdirs, errors
 
-            logger.debug(f"处理可能的重复组 ({processed_groups}/{total_groups}): "
-                         f"{len(files)} 个文件，每个 {self._format_size(size)}")
-
-            # 根据比较方法进行精确比较
-            if self.compare_method == CompareMethod.SIZE:
-                # 如果仅按大小比较，则直接添加到结果中
-                self.duplicate_groups.append(files)
-
-            elif self.compare_method == CompareMethod.HASH:
-                # 按哈希值比较
-                hash_groups = defaultdict(list)
+    def _find_exact_duplicates(self, potential_duplicates: Dict[int, List[str]]) -> None:
+        """通过比较文件内容找出精确的重复文件（按大小比较时不调用）"""
+        # 根据比较方法进行精确比较
+        if self.compare_method == CompareMethod.HASH:
+            # 按哈希值比较，将哈希值相同的文件组添加到结果中
+            for size, file_group in self._group_by_hash(potential_duplicates):
+                self._add_duplicate_group(size, file_group)
+
+        elif self.compare_method == CompareMethod.CONTENT:
+            # 逐字节比较文件内容
+            # 先按哈希值进行初步分组，再对哈希值相同的文件组进行逐字节比较
+            for size, file_group in self._group_by_hash(potential_duplicates):
+                content_groups = self._group_by_content(file_group)
+                for content_group in content_groups:
+                    if len(content_group) > 1:
+                        self._add_duplicate_group(size, content_group)
+
+    def _add_duplicate_group(self, size: int, files: List[str]) -> None:
+        """
+        记录一组重复文件及其大小
+        
+        大小在按大小分组时已经得到，随组保存后统计和生成报告时无需再读取文件大小。
+        
+        Args:
+            size: 组内每个文件的大小
+            files: 重复文件列表
+        """
+        self.duplicate_groups.append(files)
+        self.duplicate_group_sizes.append(size)
 
-                for file_path in files:
+    def _group_by_hash(self, potential_duplicates: Dict[int, List[str]]) -> List[Tuple[int, List[str]]]:
+        """
+        按哈希值对大小相同的文件分组
+        
+        先按文件头尾采样的哈希值分组，只有采样相同的文件才计算完整哈希值，
+        开头或结尾不同的文件无需读取全部内容。所有文件的哈希值都在线程池中
+        并行计算。
+        
+        Args:
+            potential_duplicates: 按大小分组的可能重复的文件
+            
+        Returns:
+            (文件大小, 哈希值相同的文件组) 列表（只包含两个及以上文件的组）
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # 第一步：并行计算所有文件的头尾采样哈希值
+            head_jobs = [(size, file_path, executor.submit(self._calculate_file_head_hash, file_path, size))
+                         for size, files in potential_duplicates.items() for file_path in files]
+            logger.debug(f"计算 {len(head_jobs)} 个文件的采样哈希值")
+
+            head_groups = defaultdict(list)
+            for size, file_path, future in head_jobs:
+                try:
+                    head_groups[(size, future.result())].append(file_path)
+                except Exception as e:
+                    logger.error(f"计算文件 {file_path} 的哈希值时出错: {e}")
+                    self.stats["errors"] += 1
+
+            # 第二步：采样相同的文件并行计算完整哈希值，按原顺序保存结果
+            pending = []
+            for (size, _), candidates in head_groups.items():
+                # 采样不同的文件不可能重复；小文件的采样已覆盖全部内容，无需再计算完整哈希值
+                if len(candidates) < 2 or size <= 2 * HEAD_SAMPLE_SIZE:
+                    self.stats["files_processed"] += len(candidates)
+                    pending.append((size, candidates, None))
+                else:
+                    futures = [executor.submit(self._calculate_file_hash, file_path)
+                               for file_path in candidates]
+                    pending.append((size, candidates, futures))
+
+            groups = []
+            for size, candidates, futures in pending:
+                if futures is None:
+                    if len(candidates) > 1:
+                        groups.append((size, candidates))
+                    continue
+
+                # 多数哈希值只出现一次，只在出现第二个文件时才创建列表
+                first_seen = {}
+                collisions = {}
+                for file_path, future in zip(candidates, futures):
                     try:
-                        file_hash = self._calculate_file_hash(file_path)
-                        hash_groups[file_hash].append(file_path)
+                        hash_value = future.result()
                         self.stats["files_processed"] += 1
                     except Exception as e:
                         logger.error(f"计算文件 {file_path} 的哈希值时出错: {e}")
                         self.stats["errors"] += 1
+                        continue
 
-                # 将哈希值相同的文件组添加到结果中
-                for hash_value, file_group in hash_groups.items():
-                    if len(file_group) > 1:
-                        self.duplicate_groups.append(file_group)
+                    if hash_value not in first_seen:
+                        first_seen[hash_value] = file_path
+                    elif hash_value not in collisions:
+                        collisions[hash_value] = [first_seen[hash_value], file_path]
+                    else:
+                        collisions[hash_value].append(file_path)
 
-            elif self.compare_method == CompareMethod.CONTENT:
-                # 逐字节比较文件内容
-                # 先按哈希值进行初步分组，再进行详细比较
-                hash_groups = defaultdict(list)
+                # 按每个哈希值第一次出现的顺序输出，与扫描顺序一致
+                if collisions:
+                    groups.extend((size, collisions[hash_value])
+                                  for hash_value in first_seen if hash_value in collisions)
 
-                for file_path in files:
-                    try:
-                        file_hash = self._calculate_file_hash(file_path)
-                        hash_groups[file_hash].append(file_path)
-                        self.stats["files_processed"] += 1
-                    except Exception as e:
-                        logger.error(f"计算文件 {file_path} 的哈希值时出错: {e}")
-                        self.stats["errors"] += 1
+        return groups
+
+    def _calculate_file_head_hash(self, file_path: str, size: int) -> str:
+        """
+        计算文件开头和结尾采样的哈希值
+        
+        文件不超过两个采样大小时读取全部内容，此时结果等同于完整哈希值。
+        
+        Args:
+            file_path: 文件路径
+            size: 文件大小
+            
+        Returns:
+            采样的哈希值
+        """
+        hasher = self._new_hasher()
+        with open(file_path, 'rb') as f:
+            hasher.update(f.read(HEAD_SAMPLE_SIZE))
+            if size > 2 * HEAD_SAMPLE_SIZE:
+                f.seek(size - HEAD_SAMPLE_SIZE)
+                hasher.update(f.read(HEAD_SAMPLE_SIZE))
+            else:
+                hasher.update(f.read())
 
-                # 对哈希值相同的文件组进行逐字节比较
-                for hash_value, file_group in hash_groups.items():
-                    if len(file_group) > 1:
-                        content_groups = self._group_by_content(file_group)
-                        for content_group in content_groups:
-                            if len(content_group) > 1:
-                                self.duplicate_groups.append(content_group)
+        return hasher.hexdigest()
 
     def _calculate_file_hash(self, file_path: str) -> str:
         """计算文件的哈希值"""
-        # 检查缓存
-        if file_path in self._hash_cache:
-            return self._hash_cache[file_path]
-
-        # 选择哈希算法
-        if self.hash_algorithm == HashAlgorithm.MD5:
-            hasher = hashlib.md5()
-        elif self.hash_algorithm == HashAlgorithm.SHA1:
-            hasher = hashlib.sha1()
-        elif self.hash_algorithm == HashAlgorithm.SHA256:
-            hasher = hashlib.sha256()
-        else:
-            raise ValueError(f"不支持的哈希算法: {self.hash_algorithm}")
-
         # 读取文件并计算哈希值
-        buffer_size = 8192  # 8KB buffer
-        with open(file_path, 'rb') as f:
-            while True:
-                data = f.read(buffer_size)
-                if not data:
-                    break
-                hasher.update(data)
+        with open(file_path, 'rb', buffering=0) as f:
+            # 文件从头到尾只读一次，提示内核加大预读
+            _fadvise(f.fileno(), 'POSIX_FADV_SEQUENTIAL')
 
-        # 存入缓存并返回
-        hash_value = hasher.hexdigest()
-        self._hash_cache[file_path] = hash_value
-        return hash_value
+            if HAS_FILE_DIGEST:
+                # 读取和更新哈希值的循环在hashlib内部完成
+                hasher = hashlib.file_digest(f, self._new_hasher)
+            else:
+                hasher = self._new_hasher()
+                buffer = bytearray(HASH_CHUNK_SIZE)
+                view = memoryview(buffer)
+                while True:
+                    n = f.readinto(buffer)
+                    if not n:
+                        break
+                    hasher.update(view[:n])
+
+            # 读完后释放页缓存，避免扫描大量文件时挤掉其他程序的缓存；
+            # 按内容比较时随后还要再读一遍，此时保留缓存
+            if self.compare_method != CompareMethod.CONTENT:
+                _fadvise(f.fileno(), 'POSIX_FADV_DONTNEED')
+
+        return hasher.hexdigest()
 
     def _group_by_content(self, files: List[str]) -> List[List[str]]:
-        """通过逐字节比较文件内容对文件进行分组"""
+        """
+        通过逐字节比较文件内容对文件进行分组
+        
+        传入的文件哈希值相同，内容几乎总是一致，因此每个文件只与已有各组的
+        第一个文件比较，通常一次比较即可归组。按输入顺序处理，组内第一个文件
+        （即被保留的原始文件）与扫描顺序一致。
+        """
         if len(files) < 2:
             return [files]
 
-        # 简单实现：两两比较文件内容
         groups = []
-        remaining = set(files)
-
-        while remaining:
-            # 取一个文件作为基准
-            base_file = next(iter(remaining))
-            remaining.remove(base_file)
-
-            # 找出与基准文件内容相同的文件
-            same_content = [base_file]
-
-            for file in list(remaining):
-                if self._compare_file_content(base_file, file):
-                    same_content.append(file)
-                    remaining.remove(file)
-
-            # 添加到结果
-            groups.append(same_content)
+        for file_path in files:
+            for group in groups:
+                if self._compare_file_content(group[0], file_path):
+                    group.append(file_path)
+                    break
+            else:
+                groups.append([file_path])
 
         return groups
 
     def _compare_file_content(self, file1: str, file2: str) -> bool:
-        """逐字节比较两个文件的内容"""
-        # 先检查文件大小是否相同
-        if os.path.getsize(file1) != os.path.getsize(file2):
-            return False
-
-        # 逐字节比较
-        buffer_size = 8192  # 8KB buffer
+        """
+        逐字节比较两个文件的内容
+        
+        调用方只传入扫描时大小相同的文件，无需再读取文件大小；
+        即使文件在扫描后被修改，逐块比较也会发现差异。
+        """
+        # 逐字节比较，块大小从4KB逐步加倍到64KB
+        buffer_size = COMPARE_MIN_CHUNK_SIZE
         with open(file1, 'rb') as f1, open(file2, 'rb') as f2:
-            while True:
-                b1 = f1.read(buffer_size)
-                b2 = f2.read(buffer_size)
+            _fadvise(f1.fileno(), 'POSIX_FADV_SEQUENTIAL')
+            _fadvise(f2.fileno(), 'POSIX_FADV_SEQUENTIAL')
+
+            try:
+                while True:
+                    b1 = f1.read(buffer_size)
+                    b2 = f2.read(buffer_size)
 
-                if b1 != b2:
-                    return False
+                    if b1 != b2:
+                        return False
 
-                if not b1:  # 文件结束
-                    return True
+                    if not b1:  # 文件结束
+                        return True
+
+                    buffer_size = min(buffer_size * 2, COMPARE_MAX_CHUNK_SIZE)
+            finally:
+                # file1是组内的基准文件，还会与其他文件比较，只释放file2的页缓存
+                _fadvise(f2.fileno(), 'POSIX_FADV_DONTNEED')
 
     def _handle_interactive(self, group_idx: int, original: str, duplicates: List[str]) -> None:
         """交互式处理重复文件组"""
@@ -594,8 +801,7 @@ class DuplicateFinder:
         lines.append("")
 
         lines.append("=== 重复文件组详情 ===")
-        for idx, group in enumerate(self.duplicate_groups):
-            group_size = os.path.getsize(group[0])
+        for idx, (group, group_size) in enumerate(zip(self.duplicate_groups, self.duplicate_group_sizes)):
             lines.append(f"\n组 #{idx + 1} - {len(group)} 个文件，每个 {self._format_size(group_size)}")
 
             for file_idx, file_path in enumerate(group):
@@ -618,9 +824,7 @@ class DuplicateFinder:
         writer.writerow(["Group", "Type", "Size", "Path"])
 
         # 写入数据行
-        for group_idx, group in enumerate(self.duplicate_groups):
-            group_size = os.path.getsize(group[0])
-
+        for group_idx, (group, group_size) in enumerate(zip(self.duplicate_groups, self.duplicate_group_sizes)):
             for file_idx, file_path in enumerate(group):
                 file_type = "Original" if file_idx == 0 else "Duplicate"
                 writer.writerow([group_idx + 1, file_type, group_size, file_path])
@@ -638,8 +842,7 @@ class DuplicateFinder:
             "duplicate_groups": []
         }
 
-        for group_idx, group in enumerate(self.duplicate_groups):
-            group_size = os.path.getsize(group[0])
+        for group_idx, (group, group_size) in enumerate(zip(self.duplicate_groups, self.duplicate_group_sizes)):
             group_data = {
                 "group_id": group_idx + 1,
                 "file_count": len(group),
@@ -682,8 +885,8 @@ def parse_arguments():
     compare_group = parser.add_argument_group('比较选项')
     compare_group.add_argument('-m', '--method', choices=['size', 'hash', 'content'],
                                default='hash', help='文件比较方法（默认: hash）')
-    compare_group.add_argument('-a', '--algorithm', choices=['md5', 'sha1', 'sha256'],
-                               default='md5', help='哈希算法（默认: md5）')
+    compare_group.add_argument('-a', '--algorithm', choices=['md5', 'sha1', 'sha256', 'blake2b'],
+                               default='blake2b', help='哈希算法（默认: blake2b）')
     compare_group.add_argument('--min-size', type=str, default='1B',
                                help='最小文件大小，如 1KB、2MB（默认: 1B）')
 
@@ -696,6 +899,11 @@ def parse_arguments():
     filter_group.add_argument('--follow-symlinks', action='store_true',
                               help='跟随符号链接')
 
+    # 性能选项
+    perf_group = parser.add_argument_group('性能选项')
+    perf_group.add_argument('--threads', type=int, default=None,
+                            help='并行扫描目录和计算哈希值的线程数（默认: CPU核心数的两倍，最多32）')
+
     # 处理选项
     action_group = parser.add_argument_group('处理选项')
     action_group.add_argument('-p', '--process', choices=['report', 'delete', 'hardlink',
@@ -783,7 +991,8 @@ def main():
             min_size=min_size,
             exclude_patterns=args.exclude or [],
             include_hidden=args.include_hidden,
-            follow_symlinks=args.follow_symlinks
+            follow_symlinks=args.follow_symlinks,
+            max_workers=args.threads
         )
 
         # 查找重复文件
@@ -10,24 +10,34 @@
 
 import argparse
 import base64
+import fnmatch
 import getpass
 import hashlib
+import hmac
 import json
 import logging
+import mmap
 import os
-import random
+import re
+import secrets
 import string
+import struct
 import sys
 import time
-from typing import List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
 
 # 导入加密所需的库
 try:
+    from cryptography.exceptions import InvalidSignature, InvalidTag
     from cryptography.fernet import Fernet, InvalidToken
     from cryptography.hazmat.backends import default_backend
     from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.hmac import HMAC
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
     from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
     from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    from cryptography.hazmat.primitives.padding import PKCS7
 except ImportError:
     print("缺少所需的加密库。请安装：pip install cryptography")
     sys.exit(1)
@@ -40,6 +50,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Python 3.11+ 提供在hashlib内部完成读取和计算的file_digest
+HAS_FILE_DIGEST = hasattr(hashlib, 'file_digest')
+
+# 只有多个CPU核心时，读写与加密重叠的流水线才能带来收益
+PIPELINE_IO = (os.cpu_count() or 1) > 1
+
 
 class EncryptionAlgorithm:
     """加密算法枚举"""
@@ -56,30 +72,71 @@ class FileEncryptor:
 
     # 加密文件扩展名
     ENCRYPTED_EXTENSION = ".encrypted"
-    # 加密元数据文件扩展名
+    # 加密元数据文件扩展名（早期格式）
     METADATA_EXTENSION = ".meta"
+    # 内嵌元数据的文件头：魔数、格式版本、原始文件哈希、原始文件大小、元数据长度，
+    # 其后是JSON格式的元数据
+    HEADER_MAGIC = b"FENC"
+    HEADER_STRUCT = struct.Struct('>4sB32sQI')
+    # 文件头中原始文件哈希和大小的偏移量及格式，加密完成后回填；
+    # 文件头的其余部分和元数据纳入认证范围，这两个字段在认证时置零
+    HEADER_DIGEST_OFFSET = 5
+    HEADER_DIGEST_STRUCT = struct.Struct('>32sQ')
     # 盐值大小（字节）
     SALT_SIZE = 16
     # 密钥派生迭代次数
     KDF_ITERATIONS = 100000
     # AES块大小（字节）
     AES_BLOCK_SIZE = 16
+    # HMAC-SHA256认证标签大小（字节）
+    HMAC_SIZE = 32
+    # AES-GCM的随机数和认证标签大小（字节）
+    GCM_NONCE_SIZE = 12
+    GCM_TAG_SIZE = 16
+    # 加密文件格式版本，记录在元数据中
+    # 1: Fernet逐块加密，每块带4字节长度前缀
+    # 2: Fernet方案改为整个文件流式加密，文件末尾附加HMAC标签
+    # 3: 文件开头增加主密钥盐值，文件密钥由主密钥经HKDF派生
+    # 4: AES方案由CBC改为GCM认证加密，文件末尾附加认证标签
+    # 5: 元数据内嵌在文件头中，不再单独生成元数据文件
+    FORMAT_VERSION = 5
+    # HKDF派生文件密钥时使用的上下文信息
+    HKDF_INFO = b"file_encrypt file key"
+    # 盐值和随机数所用随机数池的大小（字节）
+    RANDOM_POOL_SIZE = 4096
 
     def __init__(self,
                  password: str,
                  algorithm: str = EncryptionAlgorithm.FERNET,
-                 chunk_size: int = 64 * 1024):
+                 chunk_size: int = 1024 * 1024,
+                 max_workers: Optional[int] = None):
         """
         初始化加密器
         
         Args:
             password: 加密密码
             algorithm: 加密算法 ('aes' 或 'fernet')
-            chunk_size: 处理大文件时的块大小（字节）
+            chunk_size: 处理大文件时的块大小（字节），会向上对齐到内存页大小
+            max_workers: 处理目录时并行的最大进程数，默认为CPU核心数
         """
         self.password = password
         self.algorithm = algorithm.lower()
-        self.chunk_size = chunk_size
+
+        # 块大小对齐到内存页大小，同时保证是AES块大小的整数倍；
+        # 大于文件缓冲区的读取请求会直接读入结果，不经过缓冲区复制
+        self.chunk_size = max(1, -(-chunk_size // mmap.PAGESIZE)) * mmap.PAGESIZE
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        # PBKDF2耗时较长，每个实例只用一个主密钥盐值派生一次主密钥，
+        # 各文件再用各自的盐值通过HKDF从主密钥派生文件密钥
+        self._master_salt = os.urandom(self.SALT_SIZE)
+        # 已派生的主密钥缓存（主密钥盐值 -> 主密钥），解密时文件可能来自不同的加密器实例
+        self._master_keys = {}
+
+        # 盐值和随机数的随机数池，记录填充时的进程ID
+        self._random_pool = b''
+        self._random_pool_pos = 0
+        self._random_pool_pid = None
 
         if self.algorithm not in [EncryptionAlgorithm.AES, EncryptionAlgorithm.FERNET]:
             raise ValueError(f"不支持的加密算法: {algorithm}")
@@ -106,84 +163,90 @@ class FileEncryptor:
         if target_path is None:
             target_path = source_path + self.ENCRYPTED_EXTENSION
 
-        # 生成盐值
-        salt = os.urandom(self.SALT_SIZE)
-
-        # 根据算法选择加密方法
-        if self.algorithm == EncryptionAlgorithm.FERNET:
-            # 生成密钥
-            key = self._derive_key(salt)
-            # 创建Fernet实例
-            fernet = Fernet(base64.urlsafe_b64encode(key))
+        # 生成盐值和文件密钥
+        salt = self._random_bytes(self.SALT_SIZE)
+        key = self._derive_file_key(self._master_salt, salt)
+        header = self._master_salt + salt
 
-            # 计算文件哈希值
-            file_hash = self._calculate_file_hash(source_path)
+        # 加密时同步计算原始文件的哈希值和大小，无需单独再读一遍文件或查询文件大小
+        hasher = hashlib.sha256()
 
-            # 对文件进行加密
-            with open(source_path, 'rb') as f_in, open(target_path, 'wb') as f_out:
-                # 写入盐值
-                f_out.write(salt)
+        # 元数据内嵌在文件头中，原始文件的哈希值和大小在加密完成后回填
+        metadata = json.dumps({
+            "algorithm": self.algorithm,
+            "original_filename": os.path.basename(source_path),
+            "encrypted_time": time.time()
+        }).encode('utf-8')
+
+        # 文件头和元数据（回填前哈希值和大小为零）与盐值等一起纳入认证范围，
+        # 防止篡改其中的原始文件名等信息
+        authenticated_header = self.HEADER_STRUCT.pack(
+            self.HEADER_MAGIC, self.FORMAT_VERSION, bytes(32), 0, len(metadata)) + metadata
+
+        with open(source_path, 'rb') as f_in, open(target_path, 'wb') as f_out:
+            f_out.write(authenticated_header)
+
+            # 根据算法选择加密方法
+            if self.algorithm == EncryptionAlgorithm.FERNET:
+                # 与Fernet相同：密钥前16字节用于HMAC签名，后16字节用于AES加密
+                signing_key, encryption_key = key[:16], key[16:]
+                iv = self._random_bytes(self.AES_BLOCK_SIZE)
+
+                # 整个文件使用同一个AES-CBC加密上下文和HMAC上下文流式处理，
+                # 避免Fernet对每个数据块重新生成IV、计算HMAC和base64编码
+                cipher = Cipher(algorithms.AES(encryption_key), modes.CBC(iv), backend=default_backend())
+                encryptor = cipher.encryptor()
+                padder = PKCS7(algorithms.AES.block_size).padder()
+                mac = HMAC(signing_key, hashes.SHA256(), backend=default_backend())
+
+                def encrypt_chunk(data: bytes) -> bytes:
+                    hasher.update(data)
+                    encrypted_data = encryptor.update(padder.update(data))
+                    mac.update(encrypted_data)
+                    return encrypted_data
+
+                # 写入盐值和初始化向量，两者和文件头都纳入HMAC认证范围
+                header += iv
+                f_out.write(header)
+                mac.update(authenticated_header)
+                mac.update(header)
 
                 # 分块读取并加密文件
-                while True:
-                    data = f_in.read(self.chunk_size)
-                    if not data:
-                        break
+                original_size = self._process_stream(f_in, f_out, encrypt_chunk)
 
-                    # 加密数据块
-                    encrypted_data = fernet.encrypt(data)
-                    f_out.write(len(encrypted_data).to_bytes(4, byteorder='big'))
-                    f_out.write(encrypted_data)
+                # 写入最后的填充块和HMAC标签
+                encrypted_data = encryptor.update(padder.finalize()) + encryptor.finalize()
+                mac.update(encrypted_data)
+                f_out.write(encrypted_data)
+                f_out.write(mac.finalize())
 
-        elif self.algorithm == EncryptionAlgorithm.AES:
-            # 生成密钥和初始化向量
-            key = self._derive_key(salt)
-            iv = os.urandom(self.AES_BLOCK_SIZE)
+            elif self.algorithm == EncryptionAlgorithm.AES:
+                # 使用AES-256-GCM：CTR模式的各个块可以并行加密，无需填充，并自带认证
+                nonce = self._random_bytes(self.GCM_NONCE_SIZE)
+                header += nonce
 
-            # 计算文件哈希值
-            file_hash = self._calculate_file_hash(source_path)
+                cipher = Cipher(algorithms.AES(key), modes.GCM(nonce), backend=default_backend())
+                encryptor = cipher.encryptor()
+                # 文件头、盐值和随机数不加密，但纳入认证范围
+                encryptor.authenticate_additional_data(authenticated_header + header)
 
-            # 创建AES加密器
-            cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
-            encryptor = cipher.encryptor()
+                def encrypt_chunk(data: bytes) -> bytes:
+                    hasher.update(data)
+                    return encryptor.update(data)
 
-            with open(source_path, 'rb') as f_in, open(target_path, 'wb') as f_out:
-                # 写入盐值和初始化向量
-                f_out.write(salt)
-                f_out.write(iv)
+                # 写入盐值和随机数
+                f_out.write(header)
 
                 # 分块读取并加密文件
-                while True:
-                    data = f_in.read(self.chunk_size)
-                    if not data:
-                        break
-
-                    # 确保数据块长度是16字节的倍数（AES要求）
-                    if len(data) % self.AES_BLOCK_SIZE != 0:
-                        # PKCS7填充
-                        padding_length = self.AES_BLOCK_SIZE - (len(data) % self.AES_BLOCK_SIZE)
-                        data += bytes([padding_length]) * padding_length
-
-                    # 加密数据块
-                    encrypted_data = encryptor.update(data)
-                    f_out.write(encrypted_data)
-
-                # 写入最后的加密块
-                f_out.write(encryptor.finalize())
+                original_size = self._process_stream(f_in, f_out, encrypt_chunk)
 
-        # 创建元数据文件，包含算法、哈希等信息
-        metadata_path = target_path + self.METADATA_EXTENSION
-        metadata = {
-            "algorithm": self.algorithm,
-            "original_filename": os.path.basename(source_path),
-            "original_size": os.path.getsize(source_path),
-            "hash": file_hash,
-            "encrypted_time": time.time(),
-            "encrypted_size": os.path.getsize(target_path)
-        }
+                # 写入认证标签
+                f_out.write(encryptor.finalize())
+                f_out.write(encryptor.tag)
 
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2)
+            # 回填原始文件的哈希值和大小
+            f_out.seek(self.HEADER_DIGEST_OFFSET)
+            f_out.write(self.HEADER_DIGEST_STRUCT.pack(hasher.digest(), original_size))
 
         # 如果需要删除原始文件
         if delete_original:
@@ -195,7 +258,8 @@ class FileEncryptor:
                      source_path: str,
                      target_path: Optional[str] = None,
                      delete_encrypted: bool = False,
-                     verify_hash: bool = True) -> str:
+                     verify_hash: bool = True,
+                     metadata: Optional[dict] = None) -> str:
         """
         解密文件
         
@@ -204,6 +268,7 @@ class FileEncryptor:
             target_path: 目标文件路径（解密后的文件）
             delete_encrypted: 是否删除加密文件
             verify_hash: 是否验证文件完整性
+            metadata: 已读取的元数据（如果为None，则从元数据文件读取）
             
         Returns:
             解密后的文件路径
@@ -211,38 +276,87 @@ class FileEncryptor:
         if not os.path.isfile(source_path):
             raise ValueError(f"源路径不是文件: {source_path}")
 
-        # 查找元数据文件
         metadata_path = source_path + self.METADATA_EXTENSION
-        if os.path.exists(metadata_path):
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-
-            # 使用元数据中的算法
-            algorithm = metadata.get("algorithm", self.algorithm)
-            original_filename = metadata.get("original_filename")
-            original_hash = metadata.get("hash")
-        else:
-            # 如果没有元数据，使用当前设置的算法
-            algorithm = self.algorithm
-            original_filename = os.path.basename(source_path)
-            if original_filename.endswith(self.ENCRYPTED_EXTENSION):
-                original_filename = original_filename[:-len(self.ENCRYPTED_EXTENSION)]
-            original_hash = None
-
-        # 如果没有指定目标路径，则在当前目录下恢复原始文件名
-        if target_path is None:
-            target_dir = os.path.dirname(source_path)
-            target_path = os.path.join(target_dir, original_filename)
 
         try:
-            # 读取盐值
             with open(source_path, 'rb') as f:
-                salt = f.read(self.SALT_SIZE)
+                # 新格式的元数据内嵌在文件头中；早期格式的元数据保存在单独的元数据文件中，
+                # 调用方已读取时不再重复读取
+                embedded = self._read_embedded_metadata(f)
+                authenticated_header = b''
+                if embedded is not None:
+                    metadata, authenticated_header = embedded
+                elif metadata is None and os.path.exists(metadata_path):
+                    with open(metadata_path, 'r', encoding='utf-8') as metadata_file:
+                        metadata = json.load(metadata_file)
+
+                if metadata is not None:
+                    # 使用元数据中的算法和格式版本，早期版本的元数据没有记录格式版本
+                    version = metadata.get("version", 1)
+                    algorithm = metadata.get("algorithm", self.algorithm)
+                    original_filename = metadata.get("original_filename")
+                    original_hash = metadata.get("hash")
+                    if target_path is None:
+                        original_filename = self._sanitize_filename(original_filename)
+                else:
+                    # 没有内嵌元数据也没有元数据文件的只能是最早格式的文件，使用当前设置的算法
+                    version = 1
+                    algorithm = self.algorithm
+                    original_filename = os.path.basename(source_path)
+                    if original_filename.endswith(self.ENCRYPTED_EXTENSION):
+                        original_filename = original_filename[:-len(self.ENCRYPTED_EXTENSION)]
+                    original_hash = None
+
+                # 如果没有指定目标路径，则在当前目录下恢复原始文件名
+                if target_path is None:
+                    target_dir = os.path.dirname(source_path)
+                    target_path = os.path.join(target_dir, original_filename)
+
+                # 读取盐值并生成密钥
+                if version >= 3:
+                    master_salt = f.read(self.SALT_SIZE)
+                    salt = f.read(self.SALT_SIZE)
+                    header = master_salt + salt
+                    key = self._derive_file_key(master_salt, salt)
+                else:
+                    salt = f.read(self.SALT_SIZE)
+                    header = salt
+                    key = self._derive_key(salt)
 
                 # 根据算法选择解密方法
-                if algorithm == EncryptionAlgorithm.FERNET:
-                    # 生成密钥
-                    key = self._derive_key(salt)
+                if algorithm == EncryptionAlgorithm.FERNET and version >= 2:
+                    # 读取初始化向量，计算密文长度（去掉文件头和末尾的HMAC标签）
+                    iv = f.read(self.AES_BLOCK_SIZE)
+                    header += iv
+                    remaining = os.fstat(f.fileno()).st_size - f.tell() - self.HMAC_SIZE
+                    if remaining < 0 or remaining % self.AES_BLOCK_SIZE != 0:
+                        raise ValueError("加密文件长度不正确")
+
+                    signing_key, encryption_key = key[:16], key[16:]
+
+                    cipher = Cipher(algorithms.AES(encryption_key), modes.CBC(iv), backend=default_backend())
+                    decryptor = cipher.decryptor()
+                    unpadder = PKCS7(algorithms.AES.block_size).unpadder()
+                    mac = HMAC(signing_key, hashes.SHA256(), backend=default_backend())
+                    mac.update(authenticated_header)
+                    mac.update(header)
+
+                    with open(target_path, 'wb') as f_out:
+                        while remaining > 0:
+                            encrypted_data = f.read(min(self.chunk_size, remaining))
+                            if not encrypted_data:
+                                raise ValueError("加密文件不完整")
+                            remaining -= len(encrypted_data)
+
+                            mac.update(encrypted_data)
+                            f_out.write(unpadder.update(decryptor.update(encrypted_data)))
+
+                        # 先验证HMAC标签，再处理填充
+                        mac.verify(f.read(self.HMAC_SIZE))
+                        f_out.write(unpadder.update(decryptor.finalize()) + unpadder.finalize())
+
+                elif algorithm == EncryptionAlgorithm.FERNET:
+                    # 早期格式：每个数据块是一个独立的Fernet令牌
                     # 创建Fernet实例
                     fernet = Fernet(base64.urlsafe_b64encode(key))
 
@@ -264,35 +378,74 @@ class FileEncryptor:
                             decrypted_data = fernet.decrypt(encrypted_data)
                             f_out.write(decrypted_data)
 
+                elif algorithm == EncryptionAlgorithm.AES and version >= 4:
+                    # 读取随机数，并从文件末尾读取认证标签
+                    nonce = f.read(self.GCM_NONCE_SIZE)
+                    header += nonce
+                    data_start = f.tell()
+                    remaining = os.fstat(f.fileno()).st_size - data_start - self.GCM_TAG_SIZE
+                    if remaining < 0:
+                        raise ValueError("加密文件长度不正确")
+
+                    f.seek(-self.GCM_TAG_SIZE, os.SEEK_END)
+                    tag = f.read(self.GCM_TAG_SIZE)
+                    f.seek(data_start)
+
+                    cipher = Cipher(algorithms.AES(key), modes.GCM(nonce, tag), backend=default_backend())
+                    decryptor = cipher.decryptor()
+                    decryptor.authenticate_additional_data(authenticated_header + header)
+
+                    with open(target_path, 'wb') as f_out:
+                        while remaining > 0:
+                            encrypted_data = f.read(min(self.chunk_size, remaining))
+                            if not encrypted_data:
+                                raise ValueError("加密文件不完整")
+                            remaining -= len(encrypted_data)
+                            f_out.write(decryptor.update(encrypted_data))
+
+                        # 验证认证标签
+                        f_out.write(decryptor.finalize())
+
                 elif algorithm == EncryptionAlgorithm.AES:
+                    # 早期格式：AES-CBC，不带认证
                     # 读取初始化向量
                     iv = f.read(self.AES_BLOCK_SIZE)
 
-                    # 生成密钥
-                    key = self._derive_key(salt)
-
                     # 创建AES解密器
                     cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
                     decryptor = cipher.decryptor()
 
-                    # 读取所有加密数据
-                    encrypted_data = f.read()
-
-                    # 解密数据
-                    decrypted_data = decryptor.update(encrypted_data) + decryptor.finalize()
-
-                    # 处理填充
-                    if decrypted_data:
-                        # 获取填充长度（PKCS7填充方案）
-                        padding_length = decrypted_data[-1]
-                        # 去除填充
-                        if padding_length > 0 and padding_length <= self.AES_BLOCK_SIZE:
-                            # 验证填充
-                            if all(b == padding_length for b in decrypted_data[-padding_length:]):
-                                decrypted_data = decrypted_data[:-padding_length]
-
-                    # 写入解密后的数据
                     with open(target_path, 'wb') as f_out:
+                        # 分块解密并写入，最后一个AES块可能含有填充，暂不写出
+                        tail = b''
+                        while True:
+                            encrypted_data = f.read(self.chunk_size)
+                            if not encrypted_data:
+                                break
+
+                            decrypted_data = memoryview(decryptor.update(encrypted_data))
+                            if len(decrypted_data) >= self.AES_BLOCK_SIZE:
+                                f_out.write(tail)
+                                f_out.write(decrypted_data[:-self.AES_BLOCK_SIZE])
+                                tail = bytes(decrypted_data[-self.AES_BLOCK_SIZE:])
+                            else:
+                                tail += decrypted_data
+
+                        # 解密数据
+                        decrypted_data = tail + decryptor.finalize()
+
+                        # 处理填充
+                        if decrypted_data:
+                            # 获取填充长度（PKCS7填充方案）
+                            padding_length = decrypted_data[-1]
+                            # 去除填充
+                            if padding_length > 0 and padding_length <= self.AES_BLOCK_SIZE:
+                                # 验证填充，使用恒定时间比较
+                                expected_padding = bytes([padding_length]) * padding_length
+                                if hmac.compare_digest(decrypted_data[-padding_length:], expected_padding):
+                                    decrypted_data = decrypted_data[:-padding_length]
+
+                        # 写入最后的解密数据
                         f_out.write(decrypted_data)
 
             # 验证文件哈希
@@ -313,10 +466,10 @@ class FileEncryptor:
 
             return target_path
 
-        except (InvalidToken, ValueError) as e:
+        except (InvalidToken, InvalidSignature, InvalidTag, ValueError) as e:
             logger.error(f"解密失败: {e}")
             # 如果解密过程中出错，删除可能部分解密的文件
-            if os.path.exists(target_path):
+            if target_path is not None and os.path.exists(target_path):
                 os.remove(target_path)
             raise ValueError(f"解密失败，可能是密码错误或文件已损坏: {e}")
 
@@ -352,19 +505,16 @@ class FileEncryptor:
         # 确保目标目录存在
         os.makedirs(target_dir, exist_ok=True)
 
-        # 排除模式
-        exclude_patterns = exclude_patterns or []
+        # 排除模式在遍历前一次性编译
+        exclude_re = self._compile_exclude_patterns(exclude_patterns)
 
-        success_count = 0
-        fail_count = 0
+        # 先收集所有待处理的文件，再交给进程池并行处理
+        tasks = []
 
         # 遍历源目录
-        for root, dirs, files in os.walk(source_dir):
-            # 计算相对路径
-            rel_path = os.path.relpath(root, source_dir)
-
+        for root, rel_path, files in self._walk_directory(source_dir, recursive):
             # 创建对应的目标子目录
-            if rel_path != '.':
+            if rel_path:
                 target_subdir = os.path.join(target_dir, rel_path)
                 os.makedirs(target_subdir, exist_ok=True)
             else:
@@ -373,25 +523,19 @@ class FileEncryptor:
             # 处理文件
             for file in files:
                 # 检查是否排除
-                if any(self._match_pattern(file, pattern) for pattern in exclude_patterns):
+                if exclude_re is not None and exclude_re.match(os.path.normcase(file)):
                     logger.debug(f"跳过排除的文件: {file}")
                     continue
 
                 source_file = os.path.join(root, file)
                 target_file = os.path.join(target_subdir, file + self.ENCRYPTED_EXTENSION)
+                tasks.append((source_file, target_file, delete_original))
 
-                try:
-                    self.encrypt_file(source_file, target_file, delete_original)
-                    success_count += 1
-                except Exception as e:
-                    logger.error(f"加密文件失败 {source_file}: {e}")
-                    fail_count += 1
+        # 在主进程中先派生主密钥，随加密器传给工作进程，避免每个进程重复派生
+        if tasks:
+            self._master_key(self._master_salt)
 
-            # 如果不递归处理，则跳出循环
-            if not recursive:
-                break
-
-        return success_count, fail_count
+        return self._run_tasks(self._encrypt_task, tasks, "加密文件失败")
 
     def decrypt_directory(self,
                           source_dir: str,
@@ -426,16 +570,17 @@ class FileEncryptor:
         # 确保目标目录存在
         os.makedirs(target_dir, exist_ok=True)
 
-        success_count = 0
-        fail_count = 0
+        # 先收集所有待处理的文件，再交给进程池并行处理
+        tasks = []
+        # 元数据中的原始文件名无效、无法解密的文件数量
+        invalid_count = 0
+        # 文件所用的主密钥盐值，不同加密会话产生的文件各不相同
+        master_salts = set()
 
         # 遍历源目录
-        for root, dirs, files in os.walk(source_dir):
-            # 计算相对路径
-            rel_path = os.path.relpath(root, source_dir)
-
+        for root, rel_path, files in self._walk_directory(source_dir, True):
             # 创建对应的目标子目录
-            if rel_path != '.':
+            if rel_path:
                 target_subdir = os.path.join(target_dir, rel_path)
                 os.makedirs(target_subdir, exist_ok=True)
             else:
@@ -444,32 +589,343 @@ class FileEncryptor:
             # 过滤加密文件
             encrypted_files = [f for f in files if f.endswith(self.ENCRYPTED_EXTENSION) and
                                not f.endswith(self.METADATA_EXTENSION)]
+            # 用目录列表判断元数据文件是否存在，无需对每个文件调用stat
+            file_names = set(files)
 
             # 处理文件
             for file in encrypted_files:
                 source_file = os.path.join(root, file)
 
-                # 获取原始文件名（从元数据或者去除扩展名）
-                metadata_file = source_file + self.METADATA_EXTENSION
-                if os.path.exists(metadata_file):
+                # 读取文件头：新格式的元数据内嵌在文件头中，其后是主密钥盐值
+                embedded = None
+                master_salt = b''
+                try:
+                    with open(source_file, 'rb') as f:
+                        embedded = self._read_embedded_metadata(f)
+                        master_salt = f.read(self.SALT_SIZE)
+                except OSError:
+                    # 交给解密时处理并记录错误
+                    pass
+
+                # 获取原始文件名（从元数据或者去除扩展名），
+                # 从元数据文件读取的元数据随任务传给decrypt_file，避免重复读取和解析
+                metadata = None
+                if embedded is not None:
+                    original_filename = embedded[0].get("original_filename")
+                    version = embedded[0]["version"]
+                elif file + self.METADATA_EXTENSION in file_names:
+                    metadata_file = source_file + self.METADATA_EXTENSION
                     with open(metadata_file, 'r', encoding='utf-8') as f:
                         metadata = json.load(f)
                     original_filename = metadata.get("original_filename")
+                    version = metadata.get("version", 1)
                 else:
-                    # 去除加密扩展名
+                    # 去除加密扩展名，没有元数据的只能是最早格式的文件
                     original_filename = file[:-len(self.ENCRYPTED_EXTENSION)]
+                    version = 1
+
+                # 元数据中的文件名不可信，不能写到目标目录之外
+                if embedded is not None or metadata is not None:
+                    try:
+                        original_filename = self._sanitize_filename(original_filename)
+                    except ValueError as e:
+                        logger.error(f"解密文件失败 {source_file}: {e}")
+                        invalid_count += 1
+                        continue
+
+                # 记录文件所用的主密钥盐值，稍后统一派生
+                if version >= 3 and len(master_salt) == self.SALT_SIZE:
+                    master_salts.add(master_salt)
 
                 target_file = os.path.join(target_subdir, original_filename)
+                tasks.append((source_file, target_file, delete_encrypted, verify_hash, metadata))
+
+        # 在主进程中先派生所有主密钥，随加密器传给工作进程
+        self._derive_master_keys(master_salts)
+
+        success_count, fail_count = self._run_tasks(self._decrypt_task, tasks, "解密文件失败")
+        return success_count, fail_count + invalid_count
 
+    @staticmethod
+    def _walk_directory(directory: str, recursive: bool) -> Iterator[Tuple[str, str, List[str]]]:
+        """
+        遍历目录，依次返回每个目录中的文件名
+        
+        直接使用os.scandir，DirEntry缓存了文件类型，不需要对每个条目调用stat；
+        同时记录相对路径，避免对每个目录调用os.path.relpath。
+        与os.walk相同，不进入指向目录的符号链接，无法读取的目录直接跳过。
+        
+        Args:
+            directory: 要遍历的目录
+            recursive: 是否递归遍历子目录
+            
+        Yields:
+            (目录路径, 相对于起始目录的路径（起始目录为空字符串）, 文件名列表)
+        """
+        stack = [(directory, '')]
+        while stack:
+            path, rel_path = stack.pop()
+            files = []
+            subdirs = []
+
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+
+                        if not is_dir:
+                            files.append(entry.name)
+                        elif recursive and not entry.is_symlink():
+                            subdirs.append((entry.path, os.path.join(rel_path, entry.name)))
+            except OSError:
+                continue
+
+            yield path, rel_path, files
+
+            # 逆序入栈，保持与目录列表相同的处理顺序
+            stack.extend(reversed(subdirs))
+
+    def _read_embedded_metadata(self, f) -> Optional[Tuple[dict, bytes]]:
+        """
+        从加密文件开头读取内嵌的元数据
+        
+        读取成功时文件位置停在元数据之后；文件没有内嵌元数据（早期格式）时
+        返回None，并回到文件开头。
+        
+        Args:
+            f: 以二进制模式打开的加密文件
+            
+        Returns:
+            (元数据字典, 需要纳入认证范围的文件头和元数据（哈希值和大小字段置零）)，
+            没有内嵌元数据时返回None
+        """
+        prefix = f.read(self.HEADER_STRUCT.size)
+        if len(prefix) == self.HEADER_STRUCT.size and prefix.startswith(self.HEADER_MAGIC):
+            _, version, digest, original_size, metadata_size = self.HEADER_STRUCT.unpack(prefix)
+            if version >= 5:
+                metadata_bytes = f.read(metadata_size)
                 try:
-                    self.decrypt_file(source_file, target_file, delete_encrypted, verify_hash)
-                    success_count += 1
-                except Exception as e:
-                    logger.error(f"解密文件失败 {source_file}: {e}")
-                    fail_count += 1
+                    metadata = json.loads(metadata_bytes)
+                except ValueError:
+                    metadata = None
+
+                if isinstance(metadata, dict):
+                    metadata.update(version=version, hash=digest.hex(), original_size=original_size)
+                    authenticated_header = self.HEADER_STRUCT.pack(
+                        self.HEADER_MAGIC, version, bytes(32), 0, metadata_size) + metadata_bytes
+                    return metadata, authenticated_header
+
+        # 早期格式的文件以主密钥盐值（或盐值）开头
+        f.seek(0)
+        return None
+
+    @staticmethod
+    def _sanitize_filename(filename) -> str:
+        """
+        检查元数据中记录的原始文件名
+        
+        元数据来自加密文件或元数据文件，不可信：只保留文件名部分，
+        避免解密后的文件被写到目标目录之外。
+        
+        Args:
+            filename: 元数据中的原始文件名
+            
+        Returns:
+            不含目录部分的文件名
+            
+        Raises:
+            ValueError: 文件名为空或为"."、".."
+        """
+        name = os.path.basename(filename) if isinstance(filename, str) else ''
+        if name in ('', '.', '..'):
+            raise ValueError(f"元数据中的原始文件名无效: {filename!r}")
+        return name
+
+    def _run_tasks(self, func: Callable[[tuple], Optional[str]],
+                   tasks: List[tuple], error_message: str) -> Tuple[int, int]:
+        """
+        并行处理文件任务
+        
+        密钥派生和加解密都是CPU密集型操作，使用多进程避免受GIL限制；
+        只有一个文件或只允许一个进程时直接在当前进程中处理。
+        
+        Args:
+            func: 处理单个任务的方法，成功返回None，失败返回错误信息
+            tasks: 任务参数列表，第一个元素为源文件路径
+            error_message: 记录失败时的日志前缀
+            
+        Returns:
+            成功处理的文件数量和失败的文件数量
+        """
+        max_workers = min(self.max_workers, len(tasks))
+        if max_workers <= 1:
+            results = map(func, tasks)
+        else:
+            # 文件较多时每次分发多个任务，减少进程间通信次数
+            chunksize = max(1, len(tasks) // (max_workers * 4))
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(func, tasks, chunksize=chunksize))
+
+        success_count = 0
+        fail_count = 0
+        for task, error in zip(tasks, results):
+            if error is None:
+                success_count += 1
+            else:
+                logger.error(f"{error_message} {task[0]}: {error}")
+                fail_count += 1
 
         return success_count, fail_count
 
+    def _encrypt_task(self, task: Tuple[str, str, bool]) -> Optional[str]:
+        """加密单个文件（在工作进程中执行），成功返回None，失败返回错误信息"""
+        try:
+            self.encrypt_file(*task)
+            return None
+        except Exception as e:
+            return str(e)
+
+    def _decrypt_task(self, task: Tuple[str, str, bool, bool, Optional[dict]]) -> Optional[str]:
+        """解密单个文件（在工作进程中执行），成功返回None，失败返回错误信息"""
+        try:
+            self.decrypt_file(*task)
+            return None
+        except Exception as e:
+            return str(e)
+
+    def _random_bytes(self, size: int) -> bytes:
+        """
+        从随机数池中取出随机数据
+        
+        盐值和随机数都很短，一次os.urandom调用即可取出上百个文件所需的随机数据。
+        随机数池只在填充它的进程中使用：加密器被复制到工作进程后会重新填充，
+        避免不同进程取出相同的盐值和随机数。
+        
+        Args:
+            size: 字节数
+            
+        Returns:
+            随机数据
+        """
+        pid = os.getpid()
+        if self._random_pool_pid != pid or self._random_pool_pos + size > len(self._random_pool):
+            self._random_pool = os.urandom(max(self.RANDOM_POOL_SIZE, size))
+            self._random_pool_pos = 0
+            self._random_pool_pid = pid
+
+        start = self._random_pool_pos
+        self._random_pool_pos += size
+        return self._random_pool[start:start + size]
+
+    def _process_stream(self, f_in, f_out, process: Callable[[bytes], bytes]) -> int:
+        """
+        分块读取输入文件，处理后写入输出文件
+        
+        大文件使用三级流水线：后台线程预读下一块、当前线程处理本块、
+        另一个后台线程写出上一块。OpenSSL和hashlib处理大块数据时释放GIL，
+        因此读写可以与加密同时进行，耗时取决于最慢的一级而不是三者之和。
+        任意时刻最多只有三个数据块在内存中。
+        
+        Args:
+            f_in: 输入文件对象
+            f_out: 输出文件对象
+            process: 处理单个数据块的函数，返回要写出的数据
+            
+        Returns:
+            读取的总字节数
+        """
+        data = f_in.read(self.chunk_size)
+        total = len(data)
+
+        # 不足一块的文件或单核机器上直接顺序处理，避免创建线程的开销
+        if len(data) < self.chunk_size or not PIPELINE_IO:
+            while data:
+                f_out.write(process(data))
+                data = f_in.read(self.chunk_size)
+                total += len(data)
+            return total
+
+        # 读线程和写线程各只有一个，保证数据块按顺序读取和写出
+        with ThreadPoolExecutor(max_workers=1) as reader, \
+                ThreadPoolExecutor(max_workers=1) as writer:
+            pending_write = None
+            while data:
+                pending_read = reader.submit(f_in.read, self.chunk_size)
+                processed = process(data)
+
+                if pending_write is not None:
+                    pending_write.result()
+                pending_write = writer.submit(f_out.write, processed)
+
+                data = pending_read.result()
+                total += len(data)
+
+            if pending_write is not None:
+                pending_write.result()
+
+        return total
+
+    def _master_key(self, master_salt: bytes) -> bytes:
+        """
+        获取主密钥盐值对应的主密钥，同一个盐值只派生一次
+        
+        Args:
+            master_salt: 主密钥盐值
+            
+        Returns:
+            主密钥
+        """
+        key = self._master_keys.get(master_salt)
+        if key is None:
+            key = self._derive_key(master_salt)
+            self._master_keys[master_salt] = key
+        return key
+
+    def _derive_master_keys(self, master_salts: set) -> None:
+        """
+        预先派生一组主密钥盐值对应的主密钥
+        
+        每个主密钥都需要一次PBKDF2，多个主密钥之间互不依赖，
+        数量多于一个时用多进程并行派生。
+        
+        Args:
+            master_salts: 主密钥盐值集合
+        """
+        salts = [salt for salt in master_salts if salt not in self._master_keys]
+        max_workers = min(self.max_workers, len(salts))
+        if max_workers <= 1:
+            keys = map(self._derive_key, salts)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                keys = list(executor.map(self._derive_key, salts))
+
+        self._master_keys.update(zip(salts, keys))
+
+    def _derive_file_key(self, master_salt: bytes, salt: bytes) -> bytes:
+        """
+        从主密钥和文件盐值派生文件密钥
+        
+        HKDF只需几次HMAC计算，代替每个文件都执行一次PBKDF2。
+        
+        Args:
+            master_salt: 主密钥盐值
+            salt: 文件盐值
+            
+        Returns:
+            文件密钥
+        """
+        hkdf = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=salt,
+            info=self.HKDF_INFO,
+            backend=default_backend()
+        )
+        return hkdf.derive(self._master_key(master_salt))
+
     def _derive_key(self, salt: bytes) -> bytes:
         """
         从密码和盐值派生密钥
@@ -500,19 +956,28 @@ class FileEncryptor:
         Returns:
             哈希值的十六进制字符串
         """
-        hasher = hashlib.sha256()
         with open(file_path, 'rb') as f:
+            if HAS_FILE_DIGEST:
+                # 读取和更新哈希值的循环在hashlib内部完成，计算时释放GIL
+                return hashlib.file_digest(f, 'sha256').hexdigest()
+
+            hasher = hashlib.sha256()
             for chunk in iter(lambda: f.read(self.chunk_size), b''):
                 hasher.update(chunk)
-        return hasher.hexdigest()
+            return hasher.hexdigest()
 
-    def _secure_delete(self, file_path: str, passes: int = 3) -> None:
+    def _secure_delete(self, file_path: str, passes: int = 1) -> None:
         """
         安全删除文件（覆盖内容后删除）
         
+        固态硬盘的磨损均衡会把写入重定向到新的闪存块，覆盖并不能擦除原有数据，
+        只会白白消耗写入寿命，因此在固态硬盘上直接删除，由文件系统通过TRIM回收。
+        机械硬盘（或无法判断磁盘类型时）用随机数据覆盖，一遍即可，
+        全0、全1的多遍覆盖是针对早期磁盘编码方式的做法。
+        
         Args:
             file_path: 文件路径
-            passes: 覆盖次数
+            passes: 机械硬盘上的覆盖次数
         """
         if not os.path.exists(file_path):
             return
@@ -522,51 +987,77 @@ class FileEncryptor:
 
         try:
             with open(file_path, 'rb+') as f:
-                # 多次覆盖文件内容
-                for _ in range(passes):
-                    # 移动到文件开头
-                    f.seek(0)
-
-                    # 覆盖文件内容
-                    remaining = file_size
-                    while remaining > 0:
-                        chunk_size = min(self.chunk_size, remaining)
-                        # 生成随机数据
-                        if _ == 0:
-                            # 第一次用0覆盖
-                            data = b'\x00' * chunk_size
-                        elif _ == 1:
-                            # 第二次用1覆盖
-                            data = b'\xff' * chunk_size
-                        else:
-                            # 最后一次用随机数据覆盖
-                            data = os.urandom(chunk_size)
-
-                        f.write(data)
-                        remaining -= chunk_size
-
-                    # 刷新写入
-                    f.flush()
-                    os.fsync(f.fileno())
+                if self._is_rotational(f.fileno()) is False:
+                    logger.debug(f"文件位于固态硬盘，跳过覆盖: {file_path}")
+                    # 丢弃页缓存中的文件内容
+                    if hasattr(os, 'posix_fadvise'):
+                        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+                else:
+                    for _ in range(passes):
+                        # 移动到文件开头
+                        f.seek(0)
+
+                        # 用随机数据覆盖文件内容
+                        remaining = file_size
+                        while remaining > 0:
+                            chunk_size = min(self.chunk_size, remaining)
+                            f.write(os.urandom(chunk_size))
+                            remaining -= chunk_size
+
+                        # 刷新写入
+                        f.flush()
+                        os.fsync(f.fileno())
         except Exception as e:
             logger.warning(f"安全删除文件时出错 {file_path}: {e}")
 
         # 最后删除文件
         os.remove(file_path)
 
-    def _match_pattern(self, name: str, pattern: str) -> bool:
+    @staticmethod
+    def _is_rotational(fd: int) -> Optional[bool]:
+        """
+        判断文件所在的磁盘是否为机械硬盘（通过Linux的sysfs查询）
+        
+        Args:
+            fd: 文件描述符
+            
+        Returns:
+            机械硬盘返回True，固态硬盘返回False，无法判断时返回None
+        """
+        try:
+            st_dev = os.fstat(fd).st_dev
+            device_dir = f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}"
+        except (AttributeError, OSError):
+            # Windows等系统没有os.major
+            return None
+
+        # 分区本身没有queue目录，需要查看其所属的整块磁盘
+        for candidate in (device_dir, os.path.join(device_dir, '..')):
+            try:
+                with open(os.path.join(candidate, 'queue', 'rotational'), 'r') as f:
+                    return f.read().strip() == '1'
+            except OSError:
+                continue
+
+        return None
+
+    @staticmethod
+    def _compile_exclude_patterns(patterns: Optional[List[str]]) -> Optional[re.Pattern]:
         """
-        检查文件名是否匹配给定模式
+        将所有排除模式编译为一个正则表达式，每个文件名只需匹配一次
+        
+        与fnmatch.fnmatch一致，模式和文件名都先经过os.path.normcase处理。
         
         Args:
-            name: 文件名
-            pattern: 匹配模式（支持通配符）
+            patterns: 通配符模式列表
             
         Returns:
-            是否匹配
+            编译后的正则表达式，没有排除模式时返回None
         """
-        import fnmatch
-        return fnmatch.fnmatch(name, pattern)
+        if not patterns:
+            return None
+        return re.compile('|'.join(
+            f'(?:{fnmatch.translate(os.path.normcase(p))})' for p in patterns))
 
 
 def generate_random_password(length: int = 16) -> str:
@@ -580,8 +1071,18 @@ def generate_random_password(length: int = 16) -> str:
         随机密码
     """
     # 包含字母、数字和特殊字符
-    chars = string.ascii_letters + string.digits + "!@#$%^&*()-_=+[]{}|;:,.<>?"
-    return ''.join(random.choice(chars) for _ in range(length))
+    chars = (string.ascii_letters + string.digits + "!@#$%^&*()-_=+[]{}|;:,.<>?").encode()
+
+    # 使用密码学安全的随机字节，通过translate一次性映射为字符；
+    # 丢弃大于等于limit的字节，保证每个字符被选中的概率相同
+    limit = 256 - 256 % len(chars)
+    table = bytes(chars[i % len(chars)] for i in range(256))
+    rejected = bytes(range(limit, 256))
+
+    password = b''
+    while len(password) < length:
+        password += secrets.token_bytes(length).translate(table, rejected)
+    return password[:length].decode()
 
 
 def get_password(prompt: str, confirm: bool = False) -> str:
@@ -640,6 +1141,8 @@ def parse_arguments():
     parser.add_argument("--exclude", nargs="+", help="排除的文件模式列表（如 *.log *.tmp）")
     parser.add_argument("--no-verify", action="store_false", dest="verify",
                         help="解密时不验证文件完整性")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="处理目录时并行的进程数（默认: CPU核心数）")
 
     # 密码生成选项
     parser.add_argument("--length", type=int, default=16,
@@ -705,7 +1208,8 @@ def main():
     # 创建加密器
     encryptor = FileEncryptor(
         password=password,
-        algorithm=args.algorithm
+        algorithm=args.algorithm,
+        max_workers=args.processes
     )
 
     try:
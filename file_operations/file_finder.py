@@ -8,14 +8,22 @@
 """
 
 import argparse
+import csv
 import datetime
 import fnmatch
+import functools
+import heapq
 import logging
+import mmap
+import operator
 import os
 import re
 import stat
 import sys
-from typing import List, Dict, Tuple, Optional, Callable
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional, Callable, Iterator, Union
 
 # 配置日志
 logging.basicConfig(
@@ -25,6 +33,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 尝试导入pyahocorasick（用于同时搜索多个文本）
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
 # 定义文件大小单位常量
 SIZE_UNITS = {
     'B': 1,
@@ -33,11 +48,102 @@ SIZE_UNITS = {
     'GB': 1024 * 1024 * 1024,
     'TB': 1024 * 1024 * 1024 * 1024
 }
+# 不小于此大小的文件通过mmap搜索内容；较小的文件直接read()的开销更低
+MMAP_MIN_SIZE = 256 * 1024
+
+# 检测二进制文件时在文件开头查找NUL字节的范围
+BINARY_SNIFF_SIZE = 64 * 1024
+
+# 按从小到大排列的单位名称，相邻单位相差2^10倍
+SIZE_UNIT_NAMES = tuple(SIZE_UNITS)
+
+# Windows上的隐藏属性保存在st_file_attributes中（Windows上DirEntry.stat()无需额外的系统调用）
+HAS_FILE_ATTRIBUTES = hasattr(os.stat_result, 'st_file_attributes')
+
+
+@functools.lru_cache(maxsize=256)
+def _get_name_matcher(pattern: str, case_sensitive: bool, use_regex: bool) -> Callable[[str], object]:
+    """
+    构建文件名匹配函数，结果会被缓存，同一模式在多次搜索中只转换和编译一次
+    
+    通配符转换为正则表达式后编译，忽略大小写时由正则表达式处理，无需对每个文件名调用lower()
+    
+    Args:
+        pattern: 文件名模式（通配符或正则表达式）
+        case_sensitive: 是否区分大小写
+        use_regex: 是否为正则表达式
+        
+    Returns:
+        匹配函数，匹配成功时返回真值
+    """
+    flags = 0 if case_sensitive else re.IGNORECASE
+    if use_regex:
+        return re.compile(pattern, flags).search
+    return re.compile(fnmatch.translate(pattern), flags).match
+
+
+@functools.lru_cache(maxsize=256)
+def _get_content_matcher(patterns: Tuple[str, ...], case_sensitive: bool,
+                         use_regex: bool) -> Tuple[Callable[[str], object], Optional[bytes]]:
+    """
+    构建内容匹配函数，结果会被缓存，同一组模式在多次搜索中只编译一次
+    
+    直接使用编译后正则表达式的search方法；忽略大小写的文本搜索也编译为正则表达式，
+    无需对每一行调用lower()。多个模式合并为一个匹配器，每行只扫描一次。
+    
+    Args:
+        patterns: 内容模式（文本或正则表达式），匹配其中任意一个即可
+        case_sensitive: 是否区分大小写
+        use_regex: 是否为正则表达式
+        
+    Returns:
+        (匹配函数, 可以直接在文件原始字节中查找的文本)，后者只用于区分大小写的单个文本
+    """
+    flags = 0 if case_sensitive else re.IGNORECASE
+    if use_regex:
+        if len(patterns) == 1:
+            return re.compile(patterns[0], flags).search, None
+        return re.compile('|'.join(f'(?:{p})' for p in patterns), flags).search, None
+    if len(patterns) > 1 and HAS_AHOCORASICK:
+        return _build_automaton_matcher(patterns, case_sensitive), None
+    if len(patterns) > 1 or not case_sensitive:
+        return re.compile('|'.join(map(re.escape, patterns)), flags).search, None
+
+    needle = patterns[0]
+    return (lambda line: needle in line), needle.encode('utf-8')
+
+
+def _build_automaton_matcher(patterns: Tuple[str, ...], case_sensitive: bool) -> Callable[[str], bool]:
+    """
+    用Aho-Corasick自动机构建多文本匹配函数，一次扫描即可同时查找所有文本
+    
+    Args:
+        patterns: 要查找的文本
+        case_sensitive: 是否区分大小写
+        
+    Returns:
+        匹配函数，文本中包含任意一个模式时返回True
+    """
+    automaton = ahocorasick.Automaton()
+    for pattern in patterns:
+        if not case_sensitive:
+            pattern = pattern.lower()
+        automaton.add_word(pattern, pattern)
+    automaton.make_automaton()
+
+    if case_sensitive:
+        return lambda text: next(automaton.iter(text), None) is not None
+    return lambda text: next(automaton.iter(text.lower()), None) is not None
 
 
 class FileInfo:
     """文件信息类，用于存储和处理文件的各种属性"""
 
+    # 搜索结果可能有大量实例，使用__slots__省去每个实例的属性字典
+    __slots__ = ('path', 'name', 'directory', 'extension', 'size',
+                 'created_time', 'modified_time', 'accessed_time',
+                 'is_file', 'is_dir', 'is_link', 'is_hidden', 'matching_lines')
+
     def __init__(self, path: str):
         """
         初始化文件信息
@@ -45,26 +151,51 @@ class FileInfo:
         Args:
             path: 文件路径
         """
+        self._init(path, os.stat(path), os.path.islink(path))
+
+    @classmethod
+    def from_direntry(cls, entry: os.DirEntry) -> 'FileInfo':
+        """
+        从os.scandir返回的DirEntry创建文件信息
+        
+        DirEntry缓存了文件类型和stat结果，无需再对文件调用stat和islink。
+        
+        Args:
+            entry: 目录项
+            
+        Returns:
+            文件信息
+        """
+        file_info = cls.__new__(cls)
+        file_info._init(entry.path, entry.stat(), entry.is_symlink())
+        return file_info
+
+    def _init(self, path: str, stat_info: os.stat_result, is_link: bool) -> None:
+        """
+        根据路径和状态信息设置各项属性
+        
+        Args:
+            path: 文件路径
+            stat_info: 文件状态信息（跟随符号链接）
+            is_link: 是否为符号链接
+        """
         self.path = os.path.abspath(path)
         self.name = os.path.basename(path)
         self.directory = os.path.dirname(path)
         self.extension = os.path.splitext(path)[1].lower()
 
-        # 获取文件状态信息
-        stat_info = os.stat(path)
-
         self.size = stat_info.st_size
         self.created_time = stat_info.st_ctime
         self.modified_time = stat_info.st_mtime
         self.accessed_time = stat_info.st_atime
 
-        # 文件权限和类型
-        self.is_file = os.path.isfile(path)
-        self.is_dir = os.path.isdir(path)
-        self.is_link = os.path.islink(path)
+        # 文件类型直接由st_mode得出，无需再调用isfile和isdir
+        mode = stat_info.st_mode
+        self.is_file = stat.S_ISREG(mode)
+        self.is_dir = stat.S_ISDIR(mode)
+        self.is_link = is_link
         self.is_hidden = self.name.startswith('.') or bool(
-            stat_info.st_file_attributes & stat.FILE_ATTRIBUTE_HIDDEN) if hasattr(stat_info,
-                                                                                  'st_file_attributes') else False
+            HAS_FILE_ATTRIBUTES and stat_info.st_file_attributes & stat.FILE_ATTRIBUTE_HIDDEN)
 
         # 用于内容搜索的匹配行
         self.matching_lines = []
@@ -79,12 +210,9 @@ class FileInfo:
         if self.size == 0:
             return "0 B"
 
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if self.size < 1024.0 or unit == 'TB':
-                break
-            self.size /= 1024.0
-
-        return f"{self.size:.2f} {unit}"
+        # 由二进制位数直接确定单位，不修改self.size
+        index = min((self.size.bit_length() - 1) // 10, len(SIZE_UNIT_NAMES) - 1)
+        return f"{self.size / (1 << (10 * index)):.2f} {SIZE_UNIT_NAMES[index]}"
 
     def get_formatted_time(self, timestamp: float) -> str:
         """
@@ -96,7 +224,8 @@ class FileInfo:
         Returns:
             格式化后的时间字符串（YYYY-MM-DD HH:MM:SS）
         """
-        return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+        # time.strftime不需要为每个时间戳创建datetime对象
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
 
     def __str__(self) -> str:
         """
@@ -111,16 +240,36 @@ class FileInfo:
 class FileFinder:
     """文件搜索器，用于按各种条件搜索文件"""
 
-    def __init__(self, search_path: str = '.', recursive: bool = True):
+    # 排序关键字对应的FileInfo属性
+    SORT_ATTRIBUTES = {
+        'name': 'name',
+        'size': 'size',
+        'modified': 'modified_time',
+        'created': 'created_time',
+        'extension': 'extension',
+        'path': 'path'
+    }
+
+    # 时间类型对应的stat_result属性
+    TIME_FIELDS = {
+        'modified': 'st_mtime',
+        'created': 'st_ctime',
+        'accessed': 'st_atime'
+    }
+
+    def __init__(self, search_path: str = '.', recursive: bool = True,
+                 max_workers: Optional[int] = None):
         """
         初始化文件搜索器
         
         Args:
             search_path: 搜索起始路径
             recursive: 是否递归搜索子目录
+            max_workers: 并行读取目录的最大线程数，默认为CPU核心数的两倍（最多32）
         """
         self.search_path = os.path.abspath(search_path)
         self.recursive = recursive
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 2)
         self.results: List[FileInfo] = []
         self.content_matches: Dict[str, List[Tuple[int, str]]] = {}
 
@@ -144,36 +293,7 @@ class FileFinder:
         Returns:
             匹配的文件信息列表
         """
-        self.reset()
-
-        # 准备模式匹配器
-        if use_regex:
-            flags = 0 if case_sensitive else re.IGNORECASE
-            matcher = re.compile(pattern, flags)
-            match_func = lambda name: bool(matcher.search(name))
-        else:
-            if not case_sensitive:
-                pattern = pattern.lower()
-                match_func = lambda name: fnmatch.fnmatch(name.lower(), pattern)
-            else:
-                match_func = lambda name: fnmatch.fnmatch(name, pattern)
-
-        # 遍历文件系统
-        for root, dirs, files in os.walk(self.search_path):
-            # 如果不递归且不是起始目录，则跳过
-            if not self.recursive and root != self.search_path:
-                continue
-
-            # 搜索文件
-            for file in files:
-                if match_func(file):
-                    file_path = os.path.join(root, file)
-                    try:
-                        self.results.append(FileInfo(file_path))
-                    except (PermissionError, FileNotFoundError) as e:
-                        logger.warning(f"无法访问文件 {file_path}: {e}")
-
-        return self.results
+        return self.search(name=pattern, case_sensitive=case_sensitive, use_regex=use_regex)
 
     def find_by_extension(self, extensions: List[str]) -> List[FileInfo]:
         """
@@ -185,29 +305,7 @@ class FileFinder:
         Returns:
             匹配的文件信息列表
         """
-        self.reset()
-
-        # 确保扩展名以点号开头
-        normalized_extensions = [ext if ext.startswith('.') else f'.{ext}' for ext in extensions]
-        normalized_extensions = [ext.lower() for ext in normalized_extensions]
-
-        # 遍历文件系统
-        for root, dirs, files in os.walk(self.search_path):
-            # 如果不递归且不是起始目录，则跳过
-            if not self.recursive and root != self.search_path:
-                continue
-
-            # 搜索文件
-            for file in files:
-                ext = os.path.splitext(file)[1].lower()
-                if ext in normalized_extensions:
-                    file_path = os.path.join(root, file)
-                    try:
-                        self.results.append(FileInfo(file_path))
-                    except (PermissionError, FileNotFoundError) as e:
-                        logger.warning(f"无法访问文件 {file_path}: {e}")
-
-        return self.results
+        return self.search(extensions=extensions)
 
     def find_by_size(self,
                      min_size: Optional[str] = None,
@@ -222,31 +320,7 @@ class FileFinder:
         Returns:
             匹配的文件信息列表
         """
-        self.reset()
-
-        # 解析大小参数
-        min_bytes = self._parse_size(min_size) if min_size else None
-        max_bytes = self._parse_size(max_size) if max_size else None
-
-        # 遍历文件系统
-        for root, dirs, files in os.walk(self.search_path):
-            # 如果不递归且不是起始目录，则跳过
-            if not self.recursive and root != self.search_path:
-                continue
-
-            # 搜索文件
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    size = os.path.getsize(file_path)
-
-                    # 检查大小条件
-                    if (min_bytes is None or size >= min_bytes) and (max_bytes is None or size <= max_bytes):
-                        self.results.append(FileInfo(file_path))
-                except (PermissionError, FileNotFoundError, OSError) as e:
-                    logger.warning(f"无法访问文件 {file_path}: {e}")
-
-        return self.results
+        return self.search(min_size=min_size, max_size=max_size)
 
     def find_by_time(self,
                      min_date: Optional[str] = None,
@@ -263,46 +337,10 @@ class FileFinder:
         Returns:
             匹配的文件信息列表
         """
-        self.reset()
-
-        # 解析日期参数
-        min_timestamp = self._parse_date(min_date) if min_date else None
-        max_timestamp = self._parse_date(max_date, end_of_day=True) if max_date else None
-
-        # 确定时间属性
-        if time_type == 'modified':
-            time_attr = 'modified_time'
-        elif time_type == 'created':
-            time_attr = 'created_time'
-        elif time_type == 'accessed':
-            time_attr = 'accessed_time'
-        else:
-            raise ValueError(f"无效的时间类型: {time_type}")
-
-        # 遍历文件系统
-        for root, dirs, files in os.walk(self.search_path):
-            # 如果不递归且不是起始目录，则跳过
-            if not self.recursive and root != self.search_path:
-                continue
-
-            # 搜索文件
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    file_info = FileInfo(file_path)
-                    file_time = getattr(file_info, time_attr)
-
-                    # 检查时间条件
-                    if (min_timestamp is None or file_time >= min_timestamp) and (
-                            max_timestamp is None or file_time <= max_timestamp):
-                        self.results.append(file_info)
-                except (PermissionError, FileNotFoundError) as e:
-                    logger.warning(f"无法访问文件 {file_path}: {e}")
-
-        return self.results
+        return self.search(min_date=min_date, max_date=max_date, time_type=time_type)
 
     def find_by_content(self,
-                        pattern: str,
+                        pattern: Union[str, List[str]],
                         case_sensitive: bool = False,
                         use_regex: bool = False,
                         max_file_size: str = "10MB",
@@ -312,144 +350,374 @@ class FileFinder:
         按文件内容搜索文件
         
         Args:
-            pattern: 内容模式（文本或正则表达式）
+            pattern: 内容模式（文本或正则表达式），多个模式时匹配其中任意一个即可
             case_sensitive: 是否区分大小写
             use_regex: 是否使用正则表达式
             max_file_size: 搜索的最大文件大小
             skip_binary: 是否跳过二进制文件
             context_lines: 匹配行前后显示的上下文行数
             
+        Returns:
+            匹配的文件信息列表
+        """
+        return self.search(content=pattern, case_sensitive=case_sensitive, use_regex=use_regex,
+                           max_file_size=max_file_size, skip_binary=skip_binary,
+                           context_lines=context_lines)
+
+    def search(self,
+               name: Optional[str] = None,
+               extensions: Optional[List[str]] = None,
+               min_size: Optional[str] = None,
+               max_size: Optional[str] = None,
+               min_date: Optional[str] = None,
+               max_date: Optional[str] = None,
+               time_type: str = 'modified',
+               content: Optional[Union[str, List[str]]] = None,
+               case_sensitive: bool = False,
+               use_regex: bool = False,
+               max_file_size: str = "10MB",
+               skip_binary: bool = True,
+               context_lines: int = 0,
+               include_hidden: bool = True,
+               only_files: bool = False,
+               only_dirs: bool = False) -> List[FileInfo]:
+        """
+        按多个条件搜索文件，所有条件在同一次遍历中检查
+        
+        未指定的条件不参与过滤。条件按开销从小到大检查：文件名、扩展名、隐藏属性、
+        文件类型、大小和时间只用到目录项缓存的信息，最后才读取文件内容；
+        只有满足全部条件的文件才创建FileInfo。
+        
+        Args:
+            name: 文件名模式（通配符或正则表达式）
+            extensions: 扩展名列表（如 ['.txt', '.py']）
+            min_size: 最小文件大小（如 "1MB"）
+            max_size: 最大文件大小（如 "10MB"）
+            min_date: 最早日期（YYYY-MM-DD 或 YYYY-MM-DD HH:MM:SS）
+            max_date: 最晚日期（YYYY-MM-DD 或 YYYY-MM-DD HH:MM:SS）
+            time_type: 时间类型，可选值: 'modified', 'created', 'accessed'
+            content: 内容模式（文本或正则表达式），多个模式时匹配其中任意一个即可
+            case_sensitive: 文件名和内容匹配是否区分大小写
+            use_regex: 文件名和内容模式是否为正则表达式
+            max_file_size: 内容搜索的最大文件大小
+            skip_binary: 内容搜索时是否跳过二进制文件
+            context_lines: 匹配行前后显示的上下文行数
+            include_hidden: 是否包含隐藏文件
+            only_files: 是否只包含文件
+            only_dirs: 是否只包含目录
+            
         Returns:
             匹配的文件信息列表
         """
         self.reset()
 
-        # 解析最大文件大小
-        max_bytes = self._parse_size(max_file_size)
+        # 准备文件名匹配器：通配符也在遍历前一次性转换并编译为正则表达式
+        name_match = None
+        if name is not None:
+            name_match = _get_name_matcher(name, case_sensitive, use_regex)
 
-        # 准备模式匹配器
-        if use_regex:
-            flags = 0 if case_sensitive else re.IGNORECASE
-            matcher = re.compile(pattern, flags)
-            match_func = lambda line: bool(matcher.search(line))
-        else:
-            if not case_sensitive:
-                pattern = pattern.lower()
-                match_func = lambda line: pattern in line.lower()
-            else:
-                match_func = lambda line: pattern in line
+        # 确保扩展名以点号开头
+        extension_suffixes = None
+        if extensions is not None:
+            normalized_extensions = frozenset(
+                (ext if ext.startswith('.') else f'.{ext}').lower() for ext in extensions)
+            extension_suffixes = tuple(normalized_extensions)
 
-        # 遍历文件系统
-        for root, dirs, files in os.walk(self.search_path):
-            # 如果不递归且不是起始目录，则跳过
-            if not self.recursive and root != self.search_path:
+        # 解析大小参数
+        min_bytes = self._parse_size(min_size) if min_size else None
+        max_bytes = self._parse_size(max_size) if max_size else None
+
+        # 解析日期参数，确定时间属性
+        if time_type not in self.TIME_FIELDS:
+            raise ValueError(f"无效的时间类型: {time_type}")
+        time_field = self.TIME_FIELDS[time_type]
+        min_timestamp = self._parse_date(min_date) if min_date else None
+        max_timestamp = self._parse_date(max_date, end_of_day=True) if max_date else None
+
+        # 准备内容匹配器
+        content_match = None
+        content_needle = None
+        if content is not None:
+            max_content_bytes = self._parse_size(max_file_size)
+            patterns = (content,) if isinstance(content, str) else tuple(content)
+            content_match, content_needle = _get_content_matcher(patterns, case_sensitive, use_regex)
+
+        check_size = min_bytes is not None or max_bytes is not None
+        check_time = min_timestamp is not None or max_timestamp is not None
+
+        # 遍历文件系统；循环中用到的属性和函数预先绑定为局部变量，避免每个文件重复查找
+        append = self.results.append
+        splitext = os.path.splitext
+        from_direntry = FileInfo.from_direntry
+        search_file_content = self._search_file_content
+        content_matches = self.content_matches
+        content_literal = not use_regex
+        for entry in self._iter_entries():
+            entry_name = entry.name
+            if name_match is not None and not name_match(entry_name):
                 continue
 
-            # 搜索文件
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    # 检查文件大小
-                    if os.path.getsize(file_path) > max_bytes:
+            if extension_suffixes is not None:
+                lower_name = entry_name.lower()
+                # 先用endswith快速排除绝大多数文件，再用splitext确认
+                # （如".txt"这样以点号开头的文件名没有扩展名）
+                if not (lower_name.endswith(extension_suffixes) and
+                        splitext(lower_name)[1] in normalized_extensions):
+                    continue
+
+            file_path = entry.path
+            try:
+                # 过滤隐藏文件和文件类型，与filter_results的判断相同
+                if not include_hidden and (entry_name.startswith('.') or (
+                        HAS_FILE_ATTRIBUTES and entry.stat().st_file_attributes & stat.FILE_ATTRIBUTE_HIDDEN)):
+                    continue
+                if (only_files and not entry.is_file()) or (only_dirs and not entry.is_dir()):
+                    continue
+
+                if check_size or check_time:
+                    stat_info = entry.stat()
+
+                    # 检查大小条件
+                    size = stat_info.st_size
+                    if (min_bytes is not None and size < min_bytes) or (max_bytes is not None and size > max_bytes):
                         continue
 
-                    # 读取文件内容并搜索
-                    if self._search_file_content(file_path, match_func, skip_binary, context_lines):
-                        file_info = FileInfo(file_path)
-                        file_info.matching_lines = self.content_matches[file_path]
-                        self.results.append(file_info)
-                except (PermissionError, FileNotFoundError, UnicodeDecodeError) as e:
-                    logger.warning(f"无法搜索文件 {file_path}: {e}")
+                    # 检查时间条件
+                    file_time = getattr(stat_info, time_field)
+                    if (min_timestamp is not None and file_time < min_timestamp) or (
+                            max_timestamp is not None and file_time > max_timestamp):
+                        continue
+
+                if content_match is not None:
+                    # 只搜索普通文件（避免在FIFO、设备文件上阻塞），检查文件大小后再读取内容
+                    if not entry.is_file() or entry.stat().st_size > max_content_bytes:
+                        continue
+                    if not search_file_content(file_path, content_match, skip_binary, context_lines,
+                                               needle=content_needle, literal=content_literal):
+                        continue
+
+                file_info = from_direntry(entry)
+                if content_match is not None:
+                    file_info.matching_lines = content_matches[file_path]
+                append(file_info)
+            except (OSError, UnicodeDecodeError) as e:
+                logger.warning(f"无法访问文件 {file_path}: {e}")
 
         return self.results
 
+    def _iter_entries(self) -> Iterator[os.DirEntry]:
+        """
+        遍历搜索路径，依次返回每个文件（非目录）的DirEntry
+        
+        os.walk会丢弃os.scandir返回的DirEntry，调用方只能拼接路径后重新stat；
+        这里直接返回DirEntry，其缓存的文件类型和stat结果可以直接使用。
+        
+        递归搜索时每个目录交给线程池中的一个任务读取，读完后立即提交其子目录，
+        多个目录的读取可以同时进行（在网络文件系统上主要是等待延迟）；
+        调用方仍按深度优先的顺序取得结果，与单线程遍历的顺序一致。
+        
+        Yields:
+            文件的目录项
+        """
+        if not self.recursive or self.max_workers <= 1:
+            stack = [self.search_path]
+            while stack:
+                files, subdirs = self._list_directory(stack.pop())
+                yield from files
+                # 逆序入栈，保持与目录列表相同的遍历顺序
+                stack.extend(reversed(subdirs))
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        # 目录路径 -> 读取该目录的任务
+        futures = {}
+        # 调用方提前结束遍历后不再提交新的目录
+        stopped = threading.Event()
+
+        def list_directory(path: str) -> Tuple[List[os.DirEntry], List[str]]:
+            files, subdirs = self._list_directory(path)
+            if not stopped.is_set():
+                for subdir in subdirs:
+                    futures[subdir] = executor.submit(list_directory, subdir)
+            return files, subdirs
+
+        try:
+            futures[self.search_path] = executor.submit(list_directory, self.search_path)
+            stack = [self.search_path]
+            while stack:
+                # 子目录的任务在父目录读完之前就已提交
+                files, subdirs = futures.pop(stack.pop()).result()
+                yield from files
+                stack.extend(reversed(subdirs))
+        finally:
+            # 提前结束遍历时取消尚未开始的任务（shutdown的cancel_futures参数需要Python 3.9）
+            stopped.set()
+            for future in list(futures.values()):
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def _list_directory(self, path: str) -> Tuple[List[os.DirEntry], List[str]]:
+        """
+        读取单个目录
+        
+        与os.walk相同，不进入指向目录的符号链接，无法读取的目录视为空目录。
+        
+        Args:
+            path: 目录路径
+            
+        Returns:
+            ([文件的目录项], [需要进入的子目录路径])
+        """
+        files = []
+        subdirs = []
+        add_file = files.append
+        recursive = self.recursive
+
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+
+                    if not is_dir:
+                        add_file(entry)
+                    elif recursive and not entry.is_symlink():
+                        subdirs.append(entry.path)
+        except OSError:
+            pass
+
+        return files, subdirs
+
     def _search_file_content(self,
                              file_path: str,
                              match_func: Callable[[str], bool],
                              skip_binary: bool = True,
-                             context_lines: int = 0) -> bool:
+                             context_lines: int = 0,
+                             needle: Optional[bytes] = None,
+                             literal: bool = False) -> bool:
         """
         搜索文件内容
         
+        文件只打开一次并以字节形式读入（较大的文件使用mmap），先在整个文件中查找，
+        不可能匹配的文件无需解码和分行。
+        
         Args:
             file_path: 文件路径
-            match_func: 匹配函数
+            match_func: 匹配函数（作用于单行文本）
             skip_binary: 是否跳过二进制文件
             context_lines: 匹配行前后显示的上下文行数
+            needle: 要查找的原始字节，不包含它的文件直接跳过
+            literal: 是否为普通文本搜索；普通文本不会跨行匹配，可以先在整个文件中查找
             
         Returns:
             是否找到匹配
         """
-        # 检查文件是否可能是二进制
-        if skip_binary:
-            try:
-                with open(file_path, 'rb') as f:
-                    chunk = f.read(1024)
-                    if b'\0' in chunk:  # 简单检测二进制文件
-                        return False
-            except (PermissionError, FileNotFoundError):
-                return False
-
-        # 读取文件内容并搜索
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size >= MMAP_MIN_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return self._search_buffer(file_path, data, match_func, skip_binary,
+                                               context_lines, needle, literal)
+            return self._search_buffer(file_path, f.read(), match_func, skip_binary,
+                                       context_lines, needle, literal)
+
+    @staticmethod
+    def _find_literal_lines(text: str, pattern: str) -> List[Tuple[int, str]]:
+        """
+        用str.find在整个文本中逐个定位匹配，只取出包含匹配的行，无需分割整个文件
+        
+        Args:
+            text: 以\n分行的文件内容
+            pattern: 要查找的文本（不含换行符）
+            
+        Returns:
+            [(行号, 行内容)]
+        """
         matching_lines = []
-        line_buffer = []  # 用于存储上下文行
+        line_num = 1
+        line_end = 0
+        pos = text.find(pattern)
+        while pos != -1:
+            line_num += text.count('\n', line_end, pos)
+            line_start = text.rfind('\n', 0, pos) + 1
+            line_end = text.find('\n', pos)
+            if line_end == -1:
+                line_end = len(text)
+            matching_lines.append((line_num, text[line_start:line_end]))
+            # 同一行只记录一次，从下一行继续查找
+            pos = text.find(pattern, line_end)
+        return matching_lines
+
+    def _search_buffer(self,
+                       file_path: str,
+                       data,
+                       match_func: Callable[[str], bool],
+                       skip_binary: bool,
+                       context_lines: int,
+                       needle: Optional[bytes],
+                       literal: bool) -> bool:
+        """
+        在文件的字节内容（bytes或mmap）中搜索，参数含义同_search_file_content
+        
+        Returns:
+            是否找到匹配
+        """
+        # 检查文件是否可能是二进制（简单检测）
+        if skip_binary and data.find(b'\0', 0, BINARY_SNIFF_SIZE) != -1:
+            return False
+
+        if needle is not None and data.find(needle) == -1:
+            return False
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for i, line in enumerate(f, 1):
-                    line = line.rstrip('\r\n')
-
-                    # 保存当前行到缓冲区（用于上下文）
-                    line_buffer.append((i, line))
-                    if len(line_buffer) > context_lines * 2 + 1:
-                        line_buffer.pop(0)
-
-                    if match_func(line):
-                        # 如果找到匹配，添加上下文行
-                        if context_lines > 0:
-                            # 添加前面的上下文行
-                            start_idx = max(0, len(line_buffer) - context_lines - 1)
-                            for idx in range(start_idx, len(line_buffer) - 1):
-                                matching_lines.append(line_buffer[idx])
-
-                        # 添加匹配行
-                        matching_lines.append((i, line))
-
-                        # 读取后面的上下文行
-                        if context_lines > 0:
-                            context_count = 0
-                            for j, next_line in enumerate(f, i + 1):
-                                next_line = next_line.rstrip('\r\n')
-                                matching_lines.append((j, next_line))
-                                context_count += 1
-                                if context_count >= context_lines:
-                                    break
+            text = data[:].decode('utf-8')
         except UnicodeDecodeError:
             # 如果解码失败，尝试以二进制方式处理
-            if not skip_binary:
-                try:
-                    with open(file_path, 'rb') as f:
-                        content = f.read()
-                        if match_func(str(content)):
-                            matching_lines.append((1, "Binary file matches"))
-                except Exception:
-                    return False
-
-        if matching_lines:
-            self.content_matches[file_path] = matching_lines
-            return True
-
-        return False
+            if not skip_binary and match_func(str(data[:])):
+                self.content_matches[file_path] = [(1, "Binary file matches")]
+                return True
+            return False
+
+        if needle is not None:
+            # 原始字节中已经找到，这里只需确定匹配所在的行
+            pattern = needle.decode('utf-8')
+            if context_lines == 0 and '\r' not in text and pattern and '\n' not in pattern:
+                self.content_matches[file_path] = self._find_literal_lines(text, pattern)
+                return True
+        elif literal and not match_func(text):
+            return False
+
+        # 按通用换行符（\r\n、\r、\n）分行，与以文本模式读取文件一致
+        lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+        if lines[-1] == '':
+            lines.pop()
+
+        matched = [i for i, line in enumerate(lines) if match_func(line)]
+        if not matched:
+            return False
+
+        if context_lines > 0:
+            # 合并相邻匹配行的上下文，每行只输出一次
+            selected = set()
+            for i in matched:
+                selected.update(range(max(0, i - context_lines), min(len(lines), i + context_lines + 1)))
+            matched = sorted(selected)
+
+        self.content_matches[file_path] = [(i + 1, lines[i]) for i in matched]
+        return True
 
     def sort_results(self,
                      key: str = 'name',
-                     reverse: bool = False) -> List[FileInfo]:
+                     reverse: bool = False,
+                     limit: int = 0) -> List[FileInfo]:
         """
         对搜索结果进行排序
         
         Args:
             key: 排序关键字，可选值: 'name', 'size', 'modified', 'created', 'extension', 'path'
             reverse: 是否倒序
+            limit: 只保留排序后的前limit个结果（0表示不限制）
             
         Returns:
             排序后的文件信息列表
@@ -457,21 +725,17 @@ class FileFinder:
         if not self.results:
             return []
 
-        # 定义排序键函数
-        if key == 'name':
-            key_func = lambda x: x.name
-        elif key == 'size':
-            key_func = lambda x: x.size
-        elif key == 'modified':
-            key_func = lambda x: x.modified_time
-        elif key == 'created':
-            key_func = lambda x: x.created_time
-        elif key == 'extension':
-            key_func = lambda x: x.extension
-        elif key == 'path':
-            key_func = lambda x: x.path
-        else:
+        # 定义排序键函数，attrgetter在C中取属性，比lambda快
+        if key not in self.SORT_ATTRIBUTES:
             raise ValueError(f"无效的排序关键字: {key}")
+        key_func = operator.attrgetter(self.SORT_ATTRIBUTES[key])
+
+        # 只需要前几个结果时用堆选出，不必对全部结果排序；
+        # heapq.nsmallest/nlargest与排序后截取的结果（包括相等元素的顺序）相同
+        if 0 < limit < len(self.results):
+            select = heapq.nlargest if reverse else heapq.nsmallest
+            self.results = select(limit, self.results, key=key_func)
+            return self.results
 
         # 排序结果
         self.results.sort(key=key_func, reverse=reverse)
@@ -496,6 +760,7 @@ class FileFinder:
             return []
 
         filtered_results = []
+        append = filtered_results.append
 
         for file_info in self.results:
             # 过滤隐藏文件
@@ -509,7 +774,7 @@ class FileFinder:
             if only_dirs and not file_info.is_dir:
                 continue
 
-            filtered_results.append(file_info)
+            append(file_info)
 
         self.results = filtered_results
         return self.results
@@ -542,13 +807,18 @@ class FileFinder:
         if not size_str:
             return 0
 
-        # 匹配数字和单位
-        match = re.match(r'^([\d.]+)\s*([KMGT]?B)?$', size_str, re.IGNORECASE)
-        if not match:
+        # 拆分开头的数字和其后的单位，直接查表
+        text = size_str.strip().upper()
+        unit = text.lstrip('0123456789.')
+        number = text[:len(text) - len(unit)]
+        unit = unit.lstrip() or 'B'
+        if not number or unit not in SIZE_UNITS:
             raise ValueError(f"无效的大小格式: {size_str}")
 
-        value = float(match.group(1))
-        unit = match.group(2).upper() if match.group(2) else 'B'
+        try:
+            value = float(number)
+        except ValueError:
+            raise ValueError(f"无效的大小格式: {size_str}")
 
         return int(value * SIZE_UNITS[unit])
 
@@ -600,36 +870,63 @@ def format_results(results: List[FileInfo],
         print("未找到匹配的文件")
         return
 
-    # 准备输出内容
-    output_lines = []
+    if format_type not in ('list', 'table', 'csv'):
+        print(f"不支持的输出格式: {format_type}")
+        return
+
+    # 逐行写出结果，不在内存中拼接完整的输出文本
+    if output_file:
+        try:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                _write_results(f, results, format_type, show_details, show_content_matches)
+            print(f"搜索结果已保存到: {output_file}")
+            return
+        except Exception as e:
+            logger.error(f"保存结果失败: {e}")
+            # 如果保存失败，输出到控制台
+
+    _write_results(sys.stdout, results, format_type, show_details, show_content_matches)
+
+
+def _write_results(out,
+                   results: List[FileInfo],
+                   format_type: str,
+                   show_details: bool,
+                   show_content_matches: bool) -> None:
+    """
+    将格式化的搜索结果逐行写入文本文件对象，其余参数含义同format_results
+    
+    Args:
+        out: 输出的文本文件对象（如sys.stdout）
+    """
+    write = out.write
 
     if format_type == 'list':
         for i, file_info in enumerate(results, 1):
             if show_details:
                 size_str = file_info.get_formatted_size()
                 modified_str = file_info.get_formatted_time(file_info.modified_time)
-                output_lines.append(f"{i}. {file_info.path}")
-                output_lines.append(f"   大小: {size_str}, 修改时间: {modified_str}")
-                output_lines.append(
-                    f"   类型: {'目录' if file_info.is_dir else '文件'}, 扩展名: {file_info.extension or '无'}")
+                write(f"{i}. {file_info.path}\n")
+                write(f"   大小: {size_str}, 修改时间: {modified_str}\n")
+                write(f"   类型: {'目录' if file_info.is_dir else '文件'}, 扩展名: {file_info.extension or '无'}\n")
 
                 if show_content_matches and hasattr(file_info, 'matching_lines') and file_info.matching_lines:
-                    output_lines.append("   匹配行:")
+                    write("   匹配行:\n")
                     for line_num, line in file_info.matching_lines[:5]:  # 限制显示的行数
-                        output_lines.append(f"      {line_num}: {line}")
+                        write(f"      {line_num}: {line}\n")
 
                     if len(file_info.matching_lines) > 5:
-                        output_lines.append(f"      ... 还有 {len(file_info.matching_lines) - 5} 行匹配")
+                        write(f"      ... 还有 {len(file_info.matching_lines) - 5} 行匹配\n")
 
-                output_lines.append("")
+                write("\n")
             else:
-                output_lines.append(file_info.path)
+                write(f"{file_info.path}\n")
 
     elif format_type == 'table':
         # 表头
         if show_details:
-            output_lines.append(f"{'序号':<5} {'文件名':<30} {'大小':<10} {'修改时间':<20} {'类型':<8} {'路径'}")
-            output_lines.append("-" * 80)
+            write(f"{'序号':<5} {'文件名':<30} {'大小':<10} {'修改时间':<20} {'类型':<8} {'路径'}\n")
+            write("-" * 80 + "\n")
 
             for i, file_info in enumerate(results, 1):
                 size_str = file_info.get_formatted_size()
@@ -638,69 +935,42 @@ def format_results(results: List[FileInfo],
                 name = file_info.name[:30]  # 截断过长的文件名
                 directory = file_info.directory
 
-                output_lines.append(f"{i:<5} {name:<30} {size_str:<10} {modified_str:<20} {type_str:<8} {directory}")
+                write(f"{i:<5} {name:<30} {size_str:<10} {modified_str:<20} {type_str:<8} {directory}\n")
 
                 if show_content_matches and hasattr(file_info, 'matching_lines') and file_info.matching_lines:
                     for line_num, line in file_info.matching_lines[:3]:  # 限制显示的行数
-                        output_lines.append(f"      {line_num}: {line[:70]}")
+                        write(f"      {line_num}: {line[:70]}\n")
 
                     if len(file_info.matching_lines) > 3:
-                        output_lines.append(f"      ... 还有 {len(file_info.matching_lines) - 3} 行匹配")
+                        write(f"      ... 还有 {len(file_info.matching_lines) - 3} 行匹配\n")
         else:
-            output_lines.append(f"{'序号':<5} {'文件名':<40} {'路径'}")
-            output_lines.append("-" * 80)
+            write(f"{'序号':<5} {'文件名':<40} {'路径'}\n")
+            write("-" * 80 + "\n")
 
             for i, file_info in enumerate(results, 1):
                 name = file_info.name[:40]  # 截断过长的文件名
-                output_lines.append(f"{i:<5} {name:<40} {file_info.directory}")
+                write(f"{i:<5} {name:<40} {file_info.directory}\n")
 
     elif format_type == 'csv':
+        # 由csv模块处理字段中的逗号、引号和换行符的转义
+        writer = csv.writer(out, lineterminator='\n')
         if show_details:
-            output_lines.append("路径,名称,大小,修改时间,创建时间,类型,扩展名")
-
-            for file_info in results:
-                size_str = file_info.get_formatted_size()
-                modified_str = file_info.get_formatted_time(file_info.modified_time)
-                created_str = file_info.get_formatted_time(file_info.created_time)
-                type_str = '目录' if file_info.is_dir else '文件'
-
-                # 转义CSV中的逗号
-                path = f'"{file_info.path}"'
-                name = f'"{file_info.name}"'
-
-                output_lines.append(
-                    f"{path},{name},{size_str},{modified_str},{created_str},{type_str},{file_info.extension}")
+            writer.writerow(("路径", "名称", "大小", "修改时间", "创建时间", "类型", "扩展名"))
+            writer.writerows(
+                (file_info.path,
+                 file_info.name,
+                 file_info.get_formatted_size(),
+                 file_info.get_formatted_time(file_info.modified_time),
+                 file_info.get_formatted_time(file_info.created_time),
+                 '目录' if file_info.is_dir else '文件',
+                 file_info.extension)
+                for file_info in results)
         else:
-            output_lines.append("路径,名称")
-
-            for file_info in results:
-                # 转义CSV中的逗号
-                path = f'"{file_info.path}"'
-                name = f'"{file_info.name}"'
-
-                output_lines.append(f"{path},{name}")
-
-    else:
-        print(f"不支持的输出格式: {format_type}")
-        return
+            writer.writerow(("路径", "名称"))
+            writer.writerows((file_info.path, file_info.name) for file_info in results)
 
     # 添加摘要信息
-    summary = f"\n找到 {len(results)} 个匹配项"
-    output_lines.append(summary)
-
-    # 输出结果
-    output_text = "\n".join(output_lines)
-
-    if output_file:
-        try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(output_text)
-            print(f"搜索结果已保存到: {output_file}")
-        except Exception as e:
-            logger.error(f"保存结果失败: {e}")
-            print(output_text)  # 如果保存失败，输出到控制台
-    else:
-        print(output_text)
+    write(f"\n找到 {len(results)} 个匹配项\n")
 
 
 def parse_arguments():
@@ -714,6 +984,8 @@ def parse_arguments():
                         help="递归搜索子目录（默认启用）")
     parser.add_argument("--no-recursive", action="store_false", dest="recursive",
                         help="不递归搜索子目录")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="并行读取目录的线程数（默认: CPU核心数的两倍，最多32）")
 
     # 搜索条件参数组
     search_group = parser.add_argument_group("搜索条件（至少指定一个）")
@@ -745,8 +1017,8 @@ def parse_arguments():
                               help="时间类型（默认: modified）")
 
     # 按内容搜索
-    search_group.add_argument("-c", "--content",
-                              help="按文件内容搜索")
+    search_group.add_argument("-c", "--content", action="append",
+                              help="按文件内容搜索（可多次指定，匹配其中任意一个即可）")
     search_group.add_argument("--max-content-size", default="10MB",
                               help="内容搜索的最大文件大小（默认: 10MB）")
     search_group.add_argument("--include-binary", action="store_true",
@@ -792,39 +1064,35 @@ def main():
     args = parse_arguments()
 
     # 创建文件搜索器
-    finder = FileFinder(args.search_path, args.recursive)
-
-    # 执行搜索（至少需要一个搜索条件）
-    if args.name:
-        results = finder.find_by_name(args.name, not args.ignore_case, args.regex)
-    elif args.extension:
-        results = finder.find_by_extension(args.extension)
-    elif args.min_size or args.max_size:
-        results = finder.find_by_size(args.min_size, args.max_size)
-    elif args.min_date or args.max_date:
-        results = finder.find_by_time(args.min_date, args.max_date, args.time_type)
-    elif args.content:
-        results = finder.find_by_content(
-            args.content,
-            not args.ignore_case,
-            args.regex,
-            args.max_content_size,
-            not args.include_binary,
-            args.context_lines
-        )
-    else:
+    finder = FileFinder(args.search_path, args.recursive, args.threads)
+
+    # 执行搜索（至少需要一个搜索条件），指定的所有条件在一次遍历中同时检查
+    if not (args.name or args.extension or args.min_size or args.max_size or
+            args.min_date or args.max_date or args.content):
         print("错误: 需要至少指定一个搜索条件")
         return 1
 
-    # 过滤结果
-    finder.filter_results(args.include_hidden, args.only_files, args.only_dirs)
-
-    # 排序结果
-    finder.sort_results(args.sort_by, args.reverse)
+    finder.search(
+        name=args.name or None,
+        extensions=args.extension or None,
+        min_size=args.min_size,
+        max_size=args.max_size,
+        min_date=args.min_date,
+        max_date=args.max_date,
+        time_type=args.time_type,
+        content=args.content or None,
+        case_sensitive=not args.ignore_case,
+        use_regex=args.regex,
+        max_file_size=args.max_content_size,
+        skip_binary=not args.include_binary,
+        context_lines=args.context_lines,
+        include_hidden=args.include_hidden,
+        only_files=args.only_files,
+        only_dirs=args.only_dirs
+    )
 
-    # 限制结果数量
-    if args.limit > 0:
-        finder.limit_results(args.limit)
+    # 排序结果，并限制结果数量
+    finder.sort_results(args.sort_by, args.reverse, args.limit)
 
     # 格式化并输出结果
     format_results(